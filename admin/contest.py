@@ -1,7 +1,8 @@
 from adminsortable2.admin import SortableInlineAdminMixin
 from django.conf.urls import url
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.core.exceptions import PermissionDenied
+from django.core.paginator import EmptyPage, Paginator
 from django.db import connection, transaction
 from django.db.models import Q, TextField
 from django.forms import ModelForm, ModelMultipleChoiceField
@@ -9,13 +10,15 @@ from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import get_object_or_404
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _, ungettext
 from reversion.admin import VersionAdmin
 
 from django_ace import AceWidget
-from judge.models import Contest, ContestProblem, ContestSubmission, Profile, Rating, Submission
+from judge.models import Contest, ContestParticipation, ContestProblem, Profile, Rating
 from judge.ratings import rate_contest
+from judge.utils.celery import redirect_to_task_status
 from judge.utils.views import NoBatchDeleteMixin
 from judge.widgets import AdminHeavySelect2MultipleWidget, AdminHeavySelect2Widget, AdminMartorWidget, \
     AdminSelect2MultipleWidget, AdminSelect2Widget
@@ -27,6 +30,49 @@ class AdminHeavySelect2Widget(AdminHeavySelect2Widget):
         return False
 
 
+class EstimatedCountPaginator(Paginator):
+    """Counts an unfiltered changelist of a large table from the table statistics instead of a COUNT(*)."""
+    estimate_above = 10000
+
+    @cached_property
+    def estimate(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where and connection.vendor == 'mysql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT TABLE_ROWS FROM information_schema.TABLES '
+                               'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                               [self.object_list.model._meta.db_table])
+                row = cursor.fetchone()
+            # Small tables are cheap to count, and their estimates are the least accurate.
+            if row is not None and row[0] is not None and row[0] > self.estimate_above:
+                return row[0]
+        return None
+
+    @cached_property
+    def count(self):
+        if self.estimate is not None:
+            return self.estimate
+        return super().count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # The estimate may be too low, so a page past it is only known to be empty once it is read.
+            if self.estimate is None or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        page = super().page(number)
+        if self.estimate is not None and page.number > 1 and not page.object_list:
+            # The estimate was too high: count the rows after all, and show the last page that has any.
+            self.__dict__.update(estimate=None, count=self.object_list.count())
+            self.__dict__.pop('num_pages', None)
+            page = super().page(min(page.number, self.num_pages))
+        return page
+
+
 class ContestTagForm(ModelForm):
     contests = ModelMultipleChoiceField(
         label=_('Included contests'),
@@ -82,9 +128,11 @@ class ContestForm(ModelForm):
     def __init__(self, *args, **kwargs):
         super(ContestForm, self).__init__(*args, **kwargs)
         if 'rate_exclude' in self.fields:
+            # Only used to check and show the selected profiles; the choices are searched through the widget.
             if self.instance and self.instance.id:
-                self.fields['rate_exclude'].queryset = \
-                    Profile.objects.filter(contest_history__contest=self.instance).distinct()
+                self.fields['rate_exclude'].queryset = Profile.objects.filter(
+                    id__in=ContestParticipation.objects.filter(contest=self.instance).values('user_id'),
+                )
             else:
                 self.fields['rate_exclude'].queryset = Profile.objects.none()
         self.fields['banned_users'].widget.can_add_related = False
@@ -98,6 +146,8 @@ class ContestForm(ModelForm):
         widgets = {
             'authors': AdminHeavySelect2MultipleWidget(data_view='profile_select2'),
             'curators': AdminHeavySelect2MultipleWidget(data_view='profile_select2'),
+            'rate_exclude': AdminHeavySelect2MultipleWidget(data_view='profile_select2',
+                                                            attrs={'style': 'width: 100%'}),
             'testers': AdminHeavySelect2MultipleWidget(data_view='profile_select2'),
             'private_contestants': AdminHeavySelect2MultipleWidget(data_view='profile_select2',
                                                                    attrs={'style': 'width: 100%'}),
@@ -127,14 +177,16 @@ class ContestAdmin(NoBatchDeleteMixin, VersionAdmin):
     )
     list_display = ('key', 'name', 'is_visible', 'is_rated', 'locked_after', 'start_time', 'end_time', 'time_limit',
                     'user_count')
-    search_fields = ('key', 'name')
+    search_fields = ('^key', 'name')
+    list_filter = (('start_time', admin.DateFieldListFilter),)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     inlines = [ContestProblemInline]
     actions_on_top = True
     actions_on_bottom = True
     form = ContestForm
     change_list_template = 'admin/judge/contest/change_list.html'
-    filter_horizontal = ['rate_exclude']
-    date_hierarchy = 'start_time'
+    actions = ['preregister_participants', 'preregister_and_enter_participants', 'rejudge_contests']
 
     def get_actions(self, request):
         actions = super(ContestAdmin, self).get_actions(request)
@@ -189,7 +241,7 @@ class ContestAdmin(NoBatchDeleteMixin, VersionAdmin):
             self._rescored = True
 
         if form.changed_data and 'locked_after' in form.changed_data:
-            self.set_locked_after(obj, form.cleaned_data['locked_after'])
+            transaction.on_commit(lambda: self._lock_submissions([obj.id], obj.locked_after))
 
     def save_related(self, request, form, formsets, change):
         super().save_related(request, form, formsets, change)
@@ -205,13 +257,14 @@ class ContestAdmin(NoBatchDeleteMixin, VersionAdmin):
         return obj.is_editable_by(request.user)
 
     def _rescore(self, contest_key):
-        from judge.tasks import rescore_contest
-        transaction.on_commit(rescore_contest.s(contest_key).delay)
+        from judge.tasks import rescore_contest_in_chunks
+        transaction.on_commit(rescore_contest_in_chunks.s(contest_key).delay)
 
     def make_visible(self, request, queryset):
         if not request.user.has_perm('judge.change_contest_visibility'):
             queryset = queryset.filter(Q(is_private=True) | Q(is_organization_private=True))
         count = queryset.update(is_visible=True)
+        Contest.invalidate_list_caches()
         self.message_user(request, ungettext('%d contest successfully marked as visible.',
                                              '%d contests successfully marked as visible.',
                                              count) % count)
@@ -220,53 +273,111 @@ class ContestAdmin(NoBatchDeleteMixin, VersionAdmin):
     def make_hidden(self, request, queryset):
         if not request.user.has_perm('judge.change_contest_visibility'):
             queryset = queryset.filter(Q(is_private=True) | Q(is_organization_private=True))
-        count = queryset.update(is_visible=True)
+        count = queryset.update(is_visible=False)
+        Contest.invalidate_list_caches()
         self.message_user(request, ungettext('%d contest successfully marked as hidden.',
                                              '%d contests successfully marked as hidden.',
                                              count) % count)
     make_hidden.short_description = _('Mark contests as hidden')
 
     def set_locked(self, request, queryset):
-        for row in queryset:
-            self.set_locked_after(row, timezone.now())
-        count = queryset.count()
-        self.message_user(request, ungettext('%d contest successfully locked.',
-                                             '%d contests successfully locked.',
-                                             count) % count)
+        locked_after = timezone.now()
+        count = self.set_locked_after(queryset, locked_after)
+        status = self._lock_submissions(list(queryset.values_list('id', flat=True)), locked_after)
+        return redirect_to_task_status(
+            status, message=ungettext('Locking the submissions to %d contest...',
+                                      'Locking the submissions to %d contests...', count) % count,
+            redirect=reverse('admin:judge_contest_changelist'),
+        )
     set_locked.short_description = _('Lock contest submissions')
 
     def set_unlocked(self, request, queryset):
-        for row in queryset:
-            self.set_locked_after(row, None)
-        count = queryset.count()
-        self.message_user(request, ungettext('%d contest successfully unlocked.',
-                                             '%d contests successfully unlocked.',
-                                             count) % count)
+        count = self.set_locked_after(queryset, None)
+        status = self._lock_submissions(list(queryset.values_list('id', flat=True)), None)
+        return redirect_to_task_status(
+            status, message=ungettext('Unlocking the submissions to %d contest...',
+                                      'Unlocking the submissions to %d contests...', count) % count,
+            redirect=reverse('admin:judge_contest_changelist'),
+        )
     set_unlocked.short_description = _('Unlock contest submissions')
 
-    def set_locked_after(self, contest, locked_after):
+    def preregister_participants(self, request, queryset):
+        time_limited = queryset.filter(time_limit__isnull=False).count()
+        if time_limited:
+            self.message_user(request, ungettext('%d contest has a time limit, and was skipped. Its contestants can '
+                                                 'only be pre-registered as they are put in the contest.',
+                                                 '%d contests have a time limit, and were skipped. Their contestants '
+                                                 'can only be pre-registered as they are put in the contest.',
+                                                 time_limited) % time_limited, level=messages.WARNING)
+        count = sum(contest.preregister_participants() for contest in queryset.filter(time_limit__isnull=True))
+        self.message_user(request, ungettext('%d participation successfully pre-registered.',
+                                             '%d participations successfully pre-registered.',
+                                             count) % count)
+    preregister_participants.short_description = _('Pre-register private contestants')
+
+    def preregister_and_enter_participants(self, request, queryset):
+        now = timezone.now()
+        not_started = queryset.filter(start_time__gt=now).count()
+        if not_started:
+            self.message_user(request, ungettext('%d contest has not started, and was skipped.',
+                                                 '%d contests have not started, and were skipped.',
+                                                 not_started) % not_started, level=messages.WARNING)
+        count = sum(contest.preregister_participants(enter=True) for contest in queryset.filter(start_time__lte=now))
+        self.message_user(request, ungettext('%d participation successfully pre-registered.',
+                                             '%d participations successfully pre-registered.',
+                                             count) % count)
+    preregister_and_enter_participants.short_description = _('Pre-register private contestants and put them in '
+                                                              'the contest')
+
+    def rejudge_contests(self, request, queryset):
+        from judge.tasks import rejudge_contest_submissions
+        count = 0
+        for contest in queryset:
+            if self.has_change_permission(request, contest):
+                rejudge_contest_submissions.delay(contest.id)
+                count += 1
+        self.message_user(request, ungettext('Rejudging of %d contest was successfully scheduled.',
+                                             'Rejudging of %d contests was successfully scheduled.',
+                                             count) % count)
+    rejudge_contests.short_description = _('Rejudge all submissions')
+
+    def set_locked_after(self, queryset, locked_after):
+        # Saved one by one so that the contest signals still run; the submissions are left to `_lock_submissions`.
         with transaction.atomic():
-            contest.locked_after = locked_after
-            contest.save()
-            Submission.objects.filter(contest_object=contest,
-                                      contest__participation__virtual=0).update(locked_after=locked_after)
+            contests = list(queryset)
+            for contest in contests:
+                contest.locked_after = locked_after
+                contest.save(update_fields=['locked_after'])
+        return len(contests)
+
+    def _lock_submissions(self, contest_ids, locked_after):
+        from judge.tasks import lock_contest_submissions
+        return lock_contest_submissions.delay(contest_ids, locked_after.isoformat() if locked_after else None)
 
     def get_urls(self):
         return [
             url(r'^rate/all/$', self.rate_all_view, name='judge_contest_rate_all'),
             url(r'^(\d+)/rate/$', self.rate_view, name='judge_contest_rate'),
+            url(r'^(\d+)/judge/$', self.rejudge_view, name='judge_contest_rejudge_all'),
             url(r'^(\d+)/judge/(\d+)/$', self.rejudge_view, name='judge_contest_rejudge'),
         ] + super(ContestAdmin, self).get_urls()
 
-    def rejudge_view(self, request, contest_id, problem_id):
-        queryset = ContestSubmission.objects.filter(problem_id=problem_id).select_related('submission')
-        for model in queryset:
-            model.submission.judge(rejudge=True)
+    def rejudge_view(self, request, contest_id, problem_id=None):
+        from judge.tasks import rejudge_contest_submissions
+        contest = get_object_or_404(Contest, id=contest_id)
+        if not self.has_change_permission(request, contest):
+            raise PermissionDenied()
+        if problem_id is not None:
+            problem = get_object_or_404(ContestProblem, id=problem_id, contest=contest)
+            message = _('Rejudging %(problem)s in %(contest)s...') % {'problem': problem.problem.name,
+                                                                     'contest': contest.name}
+        else:
+            message = _('Rejudging %s...') % contest.name
 
-        self.message_user(request, ungettext('%d submission was successfully scheduled for rejudging.',
-                                             '%d submissions were successfully scheduled for rejudging.',
-                                             len(queryset)) % len(queryset))
-        return HttpResponseRedirect(reverse('admin:judge_contest_change', args=(contest_id,)))
+        # The rejudge runs in the background, throttled, so that it does not hold the request or flood the judges.
+        status = rejudge_contest_submissions.delay(contest.id, problem_id, request.GET.getlist('language') or None)
+        return redirect_to_task_status(status, message=message,
+                                       redirect=reverse('admin:judge_contest_change', args=(contest.id,)))
 
     def rate_all_view(self, request):
         if not request.user.has_perm('judge.contest_rating'):
@@ -296,12 +407,8 @@ class ContestAdmin(NoBatchDeleteMixin, VersionAdmin):
             # on the model.
             form.base_fields['problem_label_script'].widget = AceWidget('lua', request.profile.ace_theme)
 
-        perms = ('edit_own_contest', 'edit_all_contest')
-        form.base_fields['curators'].queryset = Profile.objects.filter(
-            Q(user__is_superuser=True) |
-            Q(user__groups__permissions__codename__in=perms) |
-            Q(user__user_permissions__codename__in=perms),
-        ).distinct()
+        if 'curators' in form.base_fields:
+            form.base_fields['curators'].queryset = Profile.objects.filter(id__in=Contest.get_eligible_curator_ids())
         return form
 
 
@@ -318,14 +425,20 @@ class ContestParticipationAdmin(admin.ModelAdmin):
     list_display = ('contest', 'username', 'show_virtual', 'real_start', 'score', 'cumtime', 'tiebreaker')
     actions = ['recalculate_results']
     actions_on_bottom = actions_on_top = True
-    search_fields = ('contest__key', 'contest__name', 'user__user__username')
+    # Prefix searches, which can use the indexes on the contest key and the username.
+    search_fields = ('^contest__key', '^user__user__username')
     form = ContestParticipationForm
-    date_hierarchy = 'real_start'
+    # Filters `real_start` by ranges, rather than listing the distinct dates of every participation.
+    list_filter = (('real_start', admin.DateFieldListFilter),)
+    list_select_related = ('contest', 'user__user')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
 
     def get_queryset(self, request):
         return super(ContestParticipationAdmin, self).get_queryset(request).only(
-            'contest__name', 'contest__format_name', 'contest__format_config',
-            'user__user__username', 'real_start', 'score', 'cumtime', 'tiebreaker', 'virtual',
+            'contest', 'contest__name', 'contest__format_name', 'contest__format_config',
+            'user', 'user__user', 'user__user__username',
+            'real_start', 'score', 'cumtime', 'tiebreaker', 'virtual', 'is_disqualified',
         )
 
     def save_model(self, request, obj, form, change):
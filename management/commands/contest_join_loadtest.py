@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from judge.models import Contest, ContestParticipation, Profile
+from judge.views.coursework import CONTEST_KINDS
+
+
+class Command(BaseCommand):
+    help = 'join a homework, exercise or quiz with many users at once, and report the join latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('contest', help='key of the contest to join')
+        parser.add_argument('-n', '--users', type=int, default=100, help='number of concurrent joins')
+        parser.add_argument('--kind', choices=sorted(CONTEST_KINDS), default='quiz', help='kind of the contest')
+        parser.add_argument('--host', help='host to send the requests to, by default the first allowed host')
+        parser.add_argument('--keep', action='store_true', help='keep the participations created by the test')
+
+    def handle(self, *args, **options):
+        try:
+            contest = Contest.objects.get(key=options['contest'])
+        except Contest.DoesNotExist:
+            raise CommandError('contest not found: %s' % options['contest'])
+
+        profiles = list(Profile.objects.filter(current_contest=None).exclude(contest_history__contest=contest)
+                        .select_related('user')[:options['users']])
+        if len(profiles) < options['users']:
+            raise CommandError('only %d users are free to join this contest' % len(profiles))
+
+        host = options['host'] or next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'),
+                                       'testserver')
+        # The joins go through the URL the site serves, with all of its middleware.
+        path = reverse('%s_join' % options['kind'], args=(contest.key,))
+        clients = []
+        for profile in profiles:
+            client = Client(HTTP_HOST=host)
+            client.force_login(profile.user)
+            clients.append(client)
+        barrier = threading.Barrier(len(clients))
+
+        def join(client):
+            # Release all the joins together, as when a quiz opens.
+            barrier.wait()
+            start = time.perf_counter()
+            try:
+                status = client.post(path).status_code
+            except Exception as e:
+                status = type(e).__name__
+            finally:
+                connection.close()
+            return time.perf_counter() - start, status
+
+        with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+            results = list(executor.map(join, clients))
+
+        latencies = sorted(latency for latency, status in results)
+        for name, quantile in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1)):
+            self.stdout.write('%s: %.1f ms' % (name, latencies[int(quantile * (len(latencies) - 1))] * 1000))
+        for status, count in sorted(Counter(status for latency, status in results).items(), key=str):
+            self.stdout.write('%s: %d joins' % (status, count))
+
+        if not options['keep']:
+            ids = [profile.id for profile in profiles]
+            Profile.objects.filter(id__in=ids).update(current_contest=None)
+            ContestParticipation.objects.filter(contest=contest, user_id__in=ids).delete()
+            Contest.flush_user_count(contest.id)
@@ -1,22 +1,32 @@
+import hashlib
+import json
+from collections import defaultdict
+from functools import lru_cache
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.db import models, transaction
-from django.db.models import CASCADE, Q
+from django.db.models import CASCADE, Case, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum, When
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import gettext, gettext_lazy as _
 from jsonfield import JSONField
-from lupa import LuaRuntime
-from moss import MOSS_LANG_C, MOSS_LANG_CC, MOSS_LANG_JAVA, MOSS_LANG_PYTHON
 
 from judge import contest_format
-from judge.models.problem import Problem
+from judge.models.problem import Problem, ProblemTranslation, Solution
 from judge.models.profile import Organization, Profile
 from judge.models.submission import Submission
 from judge.ratings import rate_contest
 
-__all__ = ['Contest', 'ContestTag', 'ContestParticipation', 'ContestProblem', 'ContestSubmission', 'Rating']
+__all__ = ['Contest', 'ContestTag', 'ContestParticipation', 'ContestProblem', 'ContestSubmission', 'Rating',
+           'ContestCalendarFeedKey']
 
 
 class MinValueOrNoneValidator(MinValueValidator):
@@ -24,6 +34,15 @@ class MinValueOrNoneValidator(MinValueValidator):
         return a is not None and b is not None and super().compare(a, b)
 
 
+def _format_config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+
+@lru_cache(maxsize=256)
+def _validate_format_config(format_name, config_key):
+    contest_format.formats[format_name].validate(json.loads(config_key))
+
+
 class ContestTag(models.Model):
     color_validator = RegexValidator('^#(?:[A-Fa-f0-9]{3}){1,2}$', _('Invalid colour.'))
 
@@ -168,16 +187,57 @@ class Contest(models.Model):
         if not self.problem_label_script:
             return self.format.get_label_for_problem
 
+        # LuaJIT is only loaded by contests that have a label script.
+        from lupa import LuaRuntime
+
         def DENY_ALL(obj, attr_name, is_setting):
             raise AttributeError()
         lua = LuaRuntime(attribute_filter=DENY_ALL, register_eval=False, register_builtins=False)
         return lua.eval(self.problem_label_script)
 
+    @cached_property
+    def problem_manifest(self):
+        key = _problem_manifest_key(self.id)
+        manifest = cache.get(key)
+        if manifest is None:
+            manifest = self._build_problem_manifest()
+            cache.set(key, manifest, 86400)
+        return manifest
+
+    @cached_property
+    def cache_version(self):
+        return cache.get_or_set(_cache_version_key(self.id), _new_cache_version)
+
+    def invalidate_caches(self):
+        _invalidate_contest_caches([self.id])
+        self.__dict__.pop('cache_version', None)
+    invalidate_caches.alters_data = True
+
+    def _build_problem_manifest(self):
+        contest_problems = list(
+            self.contest_problems.select_related('problem').order_by('order')
+                .defer('problem__description', 'problem__ac_rate', 'problem__user_count')
+                .annotate(has_public_editorial=Sum(Case(When(problem__solution__is_public=True, then=1),
+                                                        default=0, output_field=IntegerField()))),
+        )
+
+        i18n_names = defaultdict(dict)
+        for problem_id, language, name in ProblemTranslation.objects.filter(problem__contests__contest=self) \
+                .values_list('problem_id', 'language', 'name'):
+            i18n_names[problem_id][language] = name
+
+        for index, contest_problem in enumerate(contest_problems):
+            contest_problem.label = self.get_label_for_problem(index)
+            problem = contest_problem.problem
+            problem.has_public_editorial = bool(contest_problem.has_public_editorial)
+            problem.i18n_names = i18n_names[problem.id]
+        return contest_problems
+
     def clean(self):
         # Django will complain if you didn't fill in start_time or end_time, so we don't have to.
         if self.start_time and self.end_time and self.start_time >= self.end_time:
             raise ValidationError('What is this? A contest that ended before it starts?')
-        self.format_class.validate(self.format_config)
+        _validate_format_config(self.format_name, _format_config_key(self.format_config))
 
         try:
             # a contest should have at least one problem, with contest problem index 0
@@ -291,6 +351,77 @@ class Contest(models.Model):
 
     update_user_count.alters_data = True
 
+    def schedule_user_count_update(self):
+        # One deferred recount covers every join until it runs, instead of a COUNT and a save per join.
+        delay = getattr(settings, 'DMOJ_CONTEST_USER_COUNT_DELAY', 5)
+        if cache.add(_user_count_pending_key(self.id), True, delay * 10):
+            from judge.tasks import update_contest_user_count
+            update_contest_user_count.apply_async((self.id,), countdown=delay)
+
+    schedule_user_count_update.alters_data = True
+
+    @classmethod
+    def flush_user_count(cls, contest_id):
+        # Joins committed after the pending flag is cleared schedule another recount, so none are missed.
+        cache.delete(_user_count_pending_key(contest_id))
+        cls.objects.filter(id=contest_id).update(
+            user_count=ContestParticipation.objects.filter(contest_id=contest_id, virtual=0).count(),
+        )
+
+    def preregister_participants(self, enter=False):
+        now = timezone.now()
+        if enter and self.start_time > now:
+            # Being in a contest bypasses its access check, which would show its problems before the start.
+            raise ValueError('cannot put users in a contest that has not started')
+        # A participation's time limit runs from its start, which can only be the time the user is put in the contest.
+        # Time-limited contests are therefore only pre-registered together with entering the users.
+        if (self.time_limit is not None and not enter) or self.ended or \
+                not (self.is_private or self.is_organization_private):
+            return 0
+
+        profiles = Profile.objects.exclude(id__in=self.banned_user_ids)
+        if self.is_private:
+            profiles = profiles.filter(id__in=Contest.private_contestants.through.objects.filter(contest=self)
+                                       .values('profile_id'))
+        if self.is_organization_private:
+            profiles = profiles.filter(organizations__in=self.organizations.all())
+        profile_ids = set(profiles.values_list('id', flat=True))
+
+        registered = self.users.filter(virtual=ContestParticipation.LIVE)
+        new_ids = profile_ids - set(registered.values_list('user_id', flat=True))
+        enter_ids = profile_ids
+        if self.time_limit is not None:
+            # Users whose own window has already run out are not put back in.
+            expired = registered.filter(real_start__lte=now - self.time_limit).values_list('user_id', flat=True)
+            enter_ids = profile_ids - set(expired)
+
+        with transaction.atomic():
+            ContestParticipation.objects.bulk_create([
+                ContestParticipation(contest=self, user_id=profile_id, virtual=ContestParticipation.LIVE,
+                                     real_start=self.start_time if self.time_limit is None else now)
+                for profile_id in new_ids
+            ], batch_size=1000, ignore_conflicts=True)
+            if enter:
+                Profile.objects.filter(id__in=enter_ids, current_contest=None).update(
+                    current_contest=Subquery(ContestParticipation.objects.filter(
+                        contest=self, user=OuterRef('pk'), virtual=ContestParticipation.LIVE,
+                    ).values('id')[:1]),
+                )
+            Contest.flush_user_count(self.id)
+        return len(new_ids)
+
+    preregister_participants.alters_data = True
+
+    @cached_property
+    def banned_user_ids(self):
+        key = 'contest_banned_users:%d:%s' % (self.id, self.cache_version)
+        banned = cache.get(key)
+        if banned is None:
+            banned = frozenset(Contest.banned_users.through.objects.filter(contest=self)
+                               .values_list('profile_id', flat=True))
+            cache.set(key, banned, 86400)
+        return banned
+
     class Inaccessible(Exception):
         pass
 
@@ -393,73 +524,80 @@ class Contest(models.Model):
 
     @classmethod
     def get_homeworks(cls, user):
-        if not user.is_authenticated:
-            return cls.objects.filter(is_visible=True, is_homework=False, is_organization_private=False, is_private=False) \
-                              .defer('description').distinct()
-        queryset = cls.objects.filter(is_homework=True).defer('description')
-        if not (user.has_perm('judge.see_private_contest') or user.has_perm('judge.edit_all_contest')):
-            q = Q(is_visible=True)
-            q &= (
-                Q(view_contest_scoreboard=user.profile) |
-                Q(is_organization_private=False, is_private=False) |
-                Q(is_organization_private=False, is_private=True, private_contestants=user.profile) |
-                Q(is_organization_private=True, is_private=False, organizations__in=user.profile.organizations.all()) |
-                Q(is_organization_private=True, is_private=True, organizations__in=user.profile.organizations.all(),
-                  private_contestants=user.profile)
-            )
+        return cls.get_visible_contests(user).filter(is_homework=True)
 
-            q |= Q(authors=user.profile)
-            q |= Q(curators=user.profile)
-            q |= Q(testers=user.profile)
-            queryset = queryset.filter(q)
-        return queryset.distinct()
-    
     @classmethod
     def get_exercises(cls, user):
-        if not user.is_authenticated:
-            return cls.objects.filter(is_visible=True, is_exercise=False, is_organization_private=False, is_private=False) \
-                              .defer('description').distinct()
-        queryset = cls.objects.filter(is_exercise=True).defer('description')
-        if not (user.has_perm('judge.see_private_contest') or user.has_perm('judge.edit_all_contest')):
-            q = Q(is_visible=True)
-            q &= (
-                Q(view_contest_scoreboard=user.profile) |
-                Q(is_organization_private=False, is_private=False) |
-                Q(is_organization_private=False, is_private=True, private_contestants=user.profile) |
-                Q(is_organization_private=True, is_private=False, organizations__in=user.profile.organizations.all()) |
-                Q(is_organization_private=True, is_private=True, organizations__in=user.profile.organizations.all(),
-                  private_contestants=user.profile)
-            )
+        return cls.get_visible_contests(user).filter(is_exercise=True)
 
-            q |= Q(authors=user.profile)
-            q |= Q(curators=user.profile)
-            q |= Q(testers=user.profile)
-            queryset = queryset.filter(q)
-        return queryset.distinct()
-    
     @classmethod
     def get_quizs(cls, user):
+        return cls.get_visible_contests(user).filter(is_quiz=True)
+
+    @classmethod
+    def get_visibility_class(cls, user):
+        # Users named on any contest see a set of contests of their own; the others share one by organizations.
         if not user.is_authenticated:
-            return cls.objects.filter(is_visible=True, is_quiz=False, is_organization_private=False, is_private=False) \
-                              .defer('description').distinct()
-        queryset = cls.objects.filter(is_quiz=True).defer('description')
-        if not (user.has_perm('judge.see_private_contest') or user.has_perm('judge.edit_all_contest')):
-            q = Q(is_visible=True)
-            q &= (
-                Q(view_contest_scoreboard=user.profile) |
-                Q(is_organization_private=False, is_private=False) |
-                Q(is_organization_private=False, is_private=True, private_contestants=user.profile) |
-                Q(is_organization_private=True, is_private=False, organizations__in=user.profile.organizations.all()) |
-                Q(is_organization_private=True, is_private=True, organizations__in=user.profile.organizations.all(),
-                  private_contestants=user.profile)
-            )
+            return 'anonymous'
+        key = _visibility_class_key(user.id)
+        visibility = cache.get(key)
+        if visibility is None:
+            visibility = cls._get_visibility_class(user)
+            cache.set(key, visibility, 86400)
+        return visibility
+
+    @classmethod
+    def get_visibility_class_by_id(cls, user_id):
+        # For requests made for a user other than the one logged in, which only load the user if it is not cached.
+        visibility = cache.get(_visibility_class_key(user_id))
+        if visibility is None:
+            visibility = cls.get_visibility_class(User.objects.select_related('profile').get(id=user_id))
+        return visibility
+
+    @classmethod
+    def _get_visibility_class(cls, user):
+        if user.has_perm('judge.see_private_contest') or user.has_perm('judge.edit_all_contest'):
+            return 'staff'
+        profile = user.profile
+        for name in _contest_access_fields:
+            field = cls._meta.get_field(name)
+            if field.remote_field.through.objects.filter(**{field.m2m_reverse_field_name(): profile}).exists():
+                return 'user:%d' % profile.id
+        organizations = ','.join(map(str, sorted(profile.organizations.values_list('id', flat=True))))
+        return 'organizations:%s' % hashlib.md5(organizations.encode()).hexdigest()
+
+    @classmethod
+    def get_list_cache_version(cls):
+        return cache.get_or_set(_list_cache_version_key, _new_cache_version)
+
+    @classmethod
+    def invalidate_list_caches(cls):
+        # For bulk updates of the visibility or kind of contests, which send no signals.
+        _invalidate_contest_lists()
+
+    @classmethod
+    def get_calendar_bounds(cls):
+        bounds = cache.get(_calendar_bounds_key)
+        if bounds is None:
+            dates = cls.objects.aggregate(min=Min('start_time'), max=Max('end_time'))
+            bounds = dates['min'], dates['max']
+            cache.set(_calendar_bounds_key, bounds, None)
+        return bounds
+
+    @classmethod
+    def get_eligible_curator_ids(cls):
+        # Dropped by the receivers below whenever a user, their groups or permissions, or a group's permissions change.
+        ids = cache.get(_eligible_curators_key)
+        if ids is None:
+            perms = ('edit_own_contest', 'edit_all_contest')
+            ids = frozenset(Profile.objects.filter(
+                Q(user__is_superuser=True) |
+                Q(user__groups__permissions__codename__in=perms) |
+                Q(user__user_permissions__codename__in=perms),
+            ).values_list('id', flat=True))
+            cache.set(_eligible_curators_key, ids, None)
+        return ids
 
-            q |= Q(authors=user.profile)
-            q |= Q(curators=user.profile)
-            q |= Q(testers=user.profile)
-            queryset = queryset.filter(q)
-        return queryset.distinct()
-                                        
     def rate(self):
         with transaction.atomic():
             Rating.objects.filter(contest__end_time__range=(self.end_time, self._now)).delete()
@@ -484,6 +622,22 @@ class Contest(models.Model):
         )
         verbose_name = _('contest')
         verbose_name_plural = _('contests')
+        indexes = [
+            # For keyset pagination of the contest lists, one per sort order
+            models.Index(fields=['start_time', 'key']),
+            models.Index(fields=['name', 'key']),
+            models.Index(fields=['user_count', 'key']),
+            # For the homework, exercise and quiz lists: the kind and visibility flags narrow the rows
+            # before the range on end_time, which splits past from running and upcoming contests.
+            models.Index(fields=['is_homework', 'is_visible', 'is_private', 'is_organization_private', 'end_time']),
+            models.Index(fields=['is_exercise', 'is_visible', 'is_private', 'is_organization_private', 'end_time']),
+            models.Index(fields=['is_quiz', 'is_visible', 'is_private', 'is_organization_private', 'end_time']),
+            # For the calendars, which select the contests of one kind overlapping a window: a range scan over
+            # end_time from the start of the window, checking start_time against its end from the index
+            models.Index(fields=['is_homework', 'end_time', 'start_time']),
+            models.Index(fields=['is_exercise', 'end_time', 'start_time']),
+            models.Index(fields=['is_quiz', 'end_time', 'start_time']),
+        ]
 
 
 class ContestParticipation(models.Model):
@@ -492,7 +646,8 @@ class ContestParticipation(models.Model):
 
     contest = models.ForeignKey(Contest, verbose_name=_('associated contest'), related_name='users', on_delete=CASCADE)
     user = models.ForeignKey(Profile, verbose_name=_('user'), related_name='contest_history', on_delete=CASCADE)
-    real_start = models.DateTimeField(verbose_name=_('start time'), default=timezone.now, db_column='start')
+    real_start = models.DateTimeField(verbose_name=_('start time'), default=timezone.now, db_column='start',
+                                      db_index=True)
     score = models.FloatField(verbose_name=_('score'), default=0, db_index=True)
     cumtime = models.PositiveIntegerField(verbose_name=_('cumulative time'), default=0)
     is_disqualified = models.BooleanField(verbose_name=_('is disqualified'), default=False,
@@ -502,12 +657,28 @@ class ContestParticipation(models.Model):
                                   help_text=_('0 means non-virtual, otherwise the n-th virtual participation.'))
     format_data = JSONField(verbose_name=_('contest format specific data'), null=True, blank=True)
 
-    def recompute_results(self):
-        with transaction.atomic():
-            self.contest.format.update_participation(self)
-            if self.is_disqualified:
-                self.score = -9999
-                self.save(update_fields=['score'])
+    def save(self, *args, **kwargs):
+        # The contest formats save the participations they update, which recompute_results(commit=False) holds back.
+        if hasattr(self, '_deferring_save'):
+            return
+        super(ContestParticipation, self).save(*args, **kwargs)
+
+    def recompute_results(self, commit=True):
+        # Without `commit`, the results are only set on the instance, for the caller to write in bulk.
+        if not commit:
+            self._deferring_save = True
+        try:
+            with transaction.atomic():
+                self.contest.format.update_participation(self)
+                if self.is_disqualified:
+                    self.score = -9999
+                    self.save(update_fields=['score'])
+        finally:
+            self.__dict__.pop('_deferring_save', None)
+        if commit and self.virtual == self.LIVE and self.contest.ended:
+            # The timeline of an ended contest is cached for a day, so rejudged results must rebuild it.
+            from judge.utils.score_timeline import schedule_score_timeline_refresh
+            schedule_score_timeline_refresh(self.contest)
     recompute_results.alters_data = True
 
     def set_disqualified(self, disqualified):
@@ -633,13 +804,61 @@ class Rating(models.Model):
         verbose_name_plural = _('contest ratings')
 
 
+def _new_calendar_feed_key():
+    return uuid4().hex
+
+
+class ContestCalendarFeedKey(models.Model):
+    user = models.OneToOneField(Profile, verbose_name=_('user'), related_name='contest_calendar_feed_key',
+                                on_delete=CASCADE)
+    key = models.CharField(verbose_name=_('key'), max_length=32, unique=True, default=_new_calendar_feed_key)
+
+    @classmethod
+    def get_key(cls, profile):
+        return cache.get_or_set(_calendar_feed_key_key(profile.id),
+                                lambda: cls.objects.get_or_create(user=profile)[0].key, 86400)
+
+    @classmethod
+    def get_user_id(cls, key):
+        # The id of the user whose feed the key opens, or None if no feed has the key.
+        user_id = cache.get(_calendar_feed_user_key(key))
+        if user_id is None:
+            user_id = cls.objects.filter(key=key).values_list('user__user_id', flat=True).first()
+            if user_id is not None:
+                cache.set(_calendar_feed_user_key(key), user_id, 86400)
+        return user_id
+
+    @classmethod
+    def regenerate(cls, profile):
+        # The old key stops working, for anyone who has seen a feed URL they should not have.
+        old_key = cls.objects.filter(user=profile).values_list('key', flat=True).first()
+        cls.objects.update_or_create(user=profile, defaults={'key': _new_calendar_feed_key()})
+        cache.delete(_calendar_feed_key_key(profile.id))
+        if old_key is not None:
+            cache.delete(_calendar_feed_user_key(old_key))
+
+    class Meta:
+        verbose_name = _('contest calendar feed key')
+        verbose_name_plural = _('contest calendar feed keys')
+
+
+class _MossLanguageMapping(object):
+    # Builds `ContestMoss.LANG_MAPPING` on first access, so that the MOSS client is only imported to run MOSS.
+    def __get__(self, instance, owner):
+        from moss import MOSS_LANG_C, MOSS_LANG_CC, MOSS_LANG_JAVA, MOSS_LANG_PYTHON
+
+        mapping = [
+            ('C', MOSS_LANG_C),
+            ('C++', MOSS_LANG_CC),
+            ('Java', MOSS_LANG_JAVA),
+            ('Python', MOSS_LANG_PYTHON),
+        ]
+        owner.LANG_MAPPING = mapping
+        return mapping
+
+
 class ContestMoss(models.Model):
-    LANG_MAPPING = [
-        ('C', MOSS_LANG_C),
-        ('C++', MOSS_LANG_CC),
-        ('Java', MOSS_LANG_JAVA),
-        ('Python', MOSS_LANG_PYTHON),
-    ]
+    LANG_MAPPING = _MossLanguageMapping()
 
     contest = models.ForeignKey(Contest, verbose_name=_('contest'), related_name='moss', on_delete=CASCADE)
     problem = models.ForeignKey(Problem, verbose_name=_('problem'), related_name='moss', on_delete=CASCADE)
@@ -651,3 +870,162 @@ class ContestMoss(models.Model):
         unique_together = ('contest', 'problem', 'language')
         verbose_name = _('contest moss result')
         verbose_name_plural = _('contest moss results')
+
+
+def _problem_manifest_key(contest_id):
+    return 'contest_problem_manifest:%d' % contest_id
+
+
+def _cache_version_key(contest_id):
+    return 'contest_cache_version:%d' % contest_id
+
+
+def _new_cache_version():
+    return uuid4().hex
+
+
+_list_cache_version_key = 'contest_list_cache_version'
+_calendar_bounds_key = 'contest_calendar_bounds'
+_eligible_curators_key = 'contest_eligible_curators'
+
+# The many-to-many fields of Contest that grant individual users access to it
+_contest_access_fields = ('authors', 'curators', 'testers', 'private_contestants', 'view_contest_scoreboard')
+
+
+def _invalidate_contest_lists():
+    cache.set(_list_cache_version_key, _new_cache_version())
+
+
+def _extend_calendar_bounds(contest):
+    # Saving a contest can only widen the bounds; deleting one drops them, to be recomputed on the next request.
+    bounds = cache.get(_calendar_bounds_key)
+    if bounds is not None:
+        start, end = bounds
+        cache.set(_calendar_bounds_key, (contest.start_time if start is None else min(start, contest.start_time),
+                                         contest.end_time if end is None else max(end, contest.end_time)), None)
+
+
+def _visibility_class_key(user_id):
+    # Keyed on the list version, so that changes to who is named on a contest drop every user's class.
+    return 'contest_visibility_class:%s:%d' % (Contest.get_list_cache_version(), user_id)
+
+
+def _invalidate_visibility_classes(user_ids):
+    cache.delete_many([_visibility_class_key(user_id) for user_id in user_ids])
+
+
+def _calendar_feed_key_key(profile_id):
+    return 'contest_calendar_feed_key:%d' % profile_id
+
+
+def _calendar_feed_user_key(key):
+    return 'contest_calendar_feed_user:%s' % key
+
+
+def _user_count_pending_key(contest_id):
+    return 'contest_user_count_pending:%d' % contest_id
+
+
+def _invalidate_contest_caches(contest_ids):
+    contest_ids = list(contest_ids)
+    cache.delete_many([_problem_manifest_key(contest_id) for contest_id in contest_ids])
+    cache.set_many({_cache_version_key(contest_id): _new_cache_version() for contest_id in contest_ids})
+
+
+@receiver(post_save, sender=Contest)
+def contest_update(sender, instance, **kwargs):
+    if hasattr(instance, '_updating_stats_only'):
+        return
+    _invalidate_contest_caches([instance.id])
+    _invalidate_contest_lists()
+    _extend_calendar_bounds(instance)
+
+
+@receiver(post_delete, sender=Contest)
+def contest_delete(sender, instance, **kwargs):
+    _invalidate_contest_lists()
+    cache.delete(_calendar_bounds_key)
+
+
+@receiver(m2m_changed, sender=Contest.organizations.through)
+def contest_organizations_update(sender, instance, action, **kwargs):
+    if action.startswith('post_') and isinstance(instance, Contest):
+        _invalidate_contest_caches([instance.id])
+        _invalidate_contest_lists()
+
+
+@receiver(m2m_changed, sender=Contest.banned_users.through)
+def contest_banned_users_update(sender, instance, action, pk_set, **kwargs):
+    if action.startswith('post_'):
+        if isinstance(instance, Contest):
+            _invalidate_contest_caches([instance.id])
+        elif pk_set:
+            _invalidate_contest_caches(pk_set)
+
+
+@receiver(m2m_changed, sender=Contest.authors.through)
+@receiver(m2m_changed, sender=Contest.curators.through)
+@receiver(m2m_changed, sender=Contest.testers.through)
+@receiver(m2m_changed, sender=Contest.private_contestants.through)
+@receiver(m2m_changed, sender=Contest.view_contest_scoreboard.through)
+def contest_access_update(sender, action, **kwargs):
+    if action.startswith('post_'):
+        _invalidate_contest_lists()
+
+
+@receiver(post_save, sender=ContestProblem)
+@receiver(post_delete, sender=ContestProblem)
+def contest_problem_update(sender, instance, **kwargs):
+    _invalidate_contest_caches([instance.contest_id])
+
+
+@receiver(post_save, sender=Problem)
+def problem_update(sender, instance, **kwargs):
+    if hasattr(instance, '_updating_stats_only'):
+        return
+    _invalidate_contest_caches(ContestProblem.objects.filter(problem_id=instance.id)
+                               .values_list('contest_id', flat=True))
+
+
+@receiver(post_save, sender=ProblemTranslation)
+@receiver(post_delete, sender=ProblemTranslation)
+@receiver(post_save, sender=Solution)
+@receiver(post_delete, sender=Solution)
+def problem_metadata_update(sender, instance, **kwargs):
+    _invalidate_contest_caches(ContestProblem.objects.filter(problem_id=instance.problem_id)
+                               .values_list('contest_id', flat=True))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def curator_user_update(sender, instance, update_fields=None, **kwargs):
+    # Logins save the user with only `last_login`, which cannot change who may curate.
+    if update_fields is None or 'is_superuser' in update_fields:
+        cache.delete(_eligible_curators_key)
+        _invalidate_visibility_classes([instance.id])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def curator_permissions_update(sender, instance, action, pk_set, **kwargs):
+    if action.startswith('post_'):
+        cache.delete(_eligible_curators_key)
+        if isinstance(instance, User):
+            _invalidate_visibility_classes([instance.id])
+        elif sender is not Group.permissions.through and pk_set is not None:
+            _invalidate_visibility_classes(pk_set)
+        else:
+            # The permissions of whole groups changed, which may move any of their members.
+            _invalidate_contest_lists()
+
+
+@receiver(m2m_changed, sender=Profile.organizations.through)
+def profile_organizations_update(sender, instance, action, pk_set, **kwargs):
+    if action.startswith('post_'):
+        if isinstance(instance, Profile):
+            _invalidate_visibility_classes([instance.user_id])
+        elif pk_set is not None:
+            _invalidate_visibility_classes(Profile.objects.filter(id__in=pk_set).values_list('user_id', flat=True))
+        else:
+            _invalidate_contest_lists()
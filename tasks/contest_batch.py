@@ -0,0 +1,255 @@
+import copy
+import time
+from datetime import timedelta
+
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext as _
+from reversion import revisions
+
+from judge.models import Contest, ContestParticipation, ContestProblem, ContestSubmission, Profile, Submission
+from judge.utils.celery import Progress
+from judge.utils.score_timeline import refresh_score_timeline
+
+__all__ = ('clone_contest', 'finalize_contest', 'finalize_ended_contests', 'finalize_expired_participations',
+           'finalize_rescore', 'lock_contest_submissions', 'refresh_contest_score_timeline',
+           'rejudge_contest_submissions', 'rescore_contest_chunk', 'rescore_contest_in_chunks',
+           'update_contest_user_count')
+
+
+@shared_task
+def update_contest_user_count(contest_id):
+    Contest.flush_user_count(contest_id)
+
+
+@shared_task
+def finalize_contest(contest_id):
+    try:
+        contest = Contest.objects.get(id=contest_id)
+    except Contest.DoesNotExist:
+        return 0
+    if not contest.ended:
+        return 0
+
+    count = Profile.objects.filter(
+        current_contest__contest=contest,
+        current_contest__virtual__in=(ContestParticipation.LIVE, ContestParticipation.SPECTATE),
+    ).update(current_contest=None)
+    refresh_score_timeline(contest)
+    return count
+
+
+@shared_task
+def finalize_expired_participations():
+    # Only the participations someone is currently in are examined, using the model's own notion of their end.
+    participations = ContestParticipation.objects.filter(
+        id__in=Profile.objects.filter(current_contest__isnull=False).values('current_contest_id'),
+    ).select_related('contest').only('id', 'virtual', 'real_start', 'contest', 'contest__start_time',
+                                     'contest__end_time', 'contest__time_limit')
+    ended = [participation.id for participation in participations.iterator() if participation.ended]
+    return Profile.objects.filter(current_contest_id__in=ended).update(current_contest=None)
+
+
+@shared_task
+def refresh_contest_score_timeline(contest_id):
+    try:
+        contest = Contest.objects.get(id=contest_id)
+    except Contest.DoesNotExist:
+        return 0
+    return len(refresh_score_timeline(contest))
+
+
+_finalize_sweep_key = 'contest_finalize_sweep'
+
+
+@shared_task
+def finalize_ended_contests():
+    # Run every minute by celery beat. If the time of the last run is lost from the cache, this run looks back
+    # DMOJ_CONTEST_FINALIZE_LOOKBACK seconds instead; finalizing a contest twice is harmless.
+    now = timezone.now()
+    since = cache.get(_finalize_sweep_key) or \
+        now - timedelta(seconds=getattr(settings, 'DMOJ_CONTEST_FINALIZE_LOOKBACK', 86400))
+    for contest_id in Contest.objects.filter(end_time__gt=since, end_time__lte=now).values_list('id', flat=True):
+        finalize_contest(contest_id)
+    cache.set(_finalize_sweep_key, now, None)
+    return finalize_expired_participations()
+
+
+@shared_task(bind=True)
+def rejudge_contest_submissions(self, contest_id, problem_id=None, languages=None, batch=True):
+    """Rejudges the submissions to a contest, or to one of its problems, optionally only in some languages.
+
+    Submissions are queued in chunks of DMOJ_CONTEST_REJUDGE_CHUNK_SIZE, at no more than DMOJ_CONTEST_REJUDGE_RATE
+    submissions per second, so that a large rejudge does not take all the judges from running contests. With
+    `batch`, they are also queued at the batch rejudge priority. The score timeline of an ended contest is rebuilt
+    once the regraded results come in, as each of them recomputes its participation.
+    """
+    queryset = ContestSubmission.objects.filter(participation__contest_id=contest_id)
+    if problem_id is not None:
+        queryset = queryset.filter(problem_id=problem_id)
+    if languages:
+        queryset = queryset.filter(submission__language__key__in=languages)
+    submission_ids = list(queryset.order_by('submission_id').values_list('submission_id', flat=True))
+
+    chunk_size = getattr(settings, 'DMOJ_CONTEST_REJUDGE_CHUNK_SIZE', 100)
+    rate = getattr(settings, 'DMOJ_CONTEST_REJUDGE_RATE', 20)
+    rejudged = 0
+    with Progress(self, len(submission_ids), stage=_('Rejudging submissions')) as p:
+        for start in range(0, len(submission_ids), chunk_size):
+            chunk = submission_ids[start:start + chunk_size]
+            started = time.monotonic()
+            for submission in Submission.objects.filter(id__in=chunk):
+                submission.judge(rejudge=True, batch_rejudge=batch)
+            rejudged += len(chunk)
+            p.done = rejudged
+            if rate:
+                time.sleep(max(len(chunk) / rate - (time.monotonic() - started), 0))
+    return rejudged
+
+
+@shared_task(bind=True)
+def lock_contest_submissions(self, contest_ids, locked_after):
+    """Sets `locked_after` on the live submissions to the given contests.
+
+    `locked_after` is an ISO 8601 string, or None to unlock. The submissions are updated by ranges of
+    DMOJ_CONTEST_LOCK_CHUNK_SIZE ids, each in its own short UPDATE, so that the submission table is never locked for
+    long while the judges are writing to it.
+    """
+    locked_after = parse_datetime(locked_after) if locked_after else None
+    chunk_size = getattr(settings, 'DMOJ_CONTEST_LOCK_CHUNK_SIZE', 1000)
+
+    ranges = []
+    for contest_id in contest_ids:
+        bounds = Submission.objects.filter(contest_object_id=contest_id).aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is not None:
+            ranges += [(contest_id, start) for start in range(bounds['first'], bounds['last'] + 1, chunk_size)]
+
+    updated = 0
+    with Progress(self, len(ranges), stage=_('Locking submissions')) as p:
+        for done, (contest_id, start) in enumerate(ranges, 1):
+            updated += Submission.objects.filter(
+                contest_object_id=contest_id, contest__participation__virtual=0,
+                id__gte=start, id__lt=start + chunk_size,
+            ).update(locked_after=locked_after)
+            p.done = done
+    return updated
+
+
+@shared_task
+def rescore_contest_chunk(contest_id, participation_ids):
+    contest = Contest.objects.get(id=contest_id)
+    participations = list(ContestParticipation.objects.filter(id__in=participation_ids))
+    for participation in participations:
+        participation.contest = contest
+        participation.recompute_results(commit=False)
+    with transaction.atomic():
+        ContestParticipation.objects.bulk_update(participations, ['score', 'cumtime', 'tiebreaker', 'format_data'])
+    return len(participations)
+
+
+@shared_task
+def finalize_rescore(contest_id):
+    # Drops the rankings and fragments built from the old scores together, once every chunk is written.
+    contest = Contest.objects.get(id=contest_id)
+    contest.invalidate_caches()
+    refresh_score_timeline(contest)
+
+
+@shared_task(bind=True)
+def rescore_contest_in_chunks(self, contest_key):
+    """Recalculates the results of every participation in a contest.
+
+    The participations are split into chunks of DMOJ_CONTEST_RESCORE_CHUNK_SIZE, each recalculated and written with
+    one bulk update. With DMOJ_CONTEST_RESCORE_PARALLEL, the chunks run as a chord over the workers, and this task
+    returns once it is queued. Once all the chunks are written, `finalize_rescore` bumps the cache version of the
+    contest and rebuilds its score timeline. If a chunk of the chord fails, that is left undone, and the contest
+    should be rescored again.
+    """
+    contest = Contest.objects.get(key=contest_key)
+    participation_ids = list(contest.users.order_by('id').values_list('id', flat=True))
+    chunk_size = getattr(settings, 'DMOJ_CONTEST_RESCORE_CHUNK_SIZE', 200)
+    chunks = [participation_ids[start:start + chunk_size] for start in range(0, len(participation_ids), chunk_size)]
+
+    if getattr(settings, 'DMOJ_CONTEST_RESCORE_PARALLEL', False) and len(chunks) > 1:
+        chord(group(rescore_contest_chunk.s(contest.id, chunk) for chunk in chunks),
+              finalize_rescore.si(contest.id)).apply_async()
+        return len(participation_ids)
+
+    with Progress(self, len(participation_ids), stage=_('Recalculating contest scores')) as p:
+        for chunk in chunks:
+            p.done += rescore_contest_chunk(contest.id, chunk)
+    finalize_rescore(contest.id)
+    return len(participation_ids)
+
+
+def _bulk_add(field_name, pairs):
+    # Inserts (contest id, related id) pairs straight into the through table of a many-to-many field of Contest.
+    field = Contest._meta.get_field(field_name)
+    through = field.remote_field.through
+    source, target = field.m2m_field_name() + '_id', field.m2m_reverse_field_name() + '_id'
+    through.objects.bulk_create([through(**{source: contest_id, target: related_id})
+                                 for contest_id, related_id in pairs])
+
+
+@shared_task(bind=True)
+def clone_contest(self, contest_id, copies, profile_id):
+    """Makes hidden, unlocked copies of a contest, with the given profile as their only author.
+
+    `copies` is a list of dicts, each with the `key` of a copy and optionally its `start_time` and `end_time`, as ISO
+    8601 strings, and its `organizations`, as a list of ids. The other fields, tags, organizations, private
+    contestants, scoreboard viewers and problems are those of the original. All the copies are made in one
+    transaction and one revision, with one insert per related table for all of them.
+    """
+    contest = Contest.objects.get(id=contest_id)
+    profile = Profile.objects.select_related('user').get(id=profile_id)
+    related = {field: list(getattr(contest, field).values_list('id', flat=True))
+               for field in ('tags', 'organizations', 'private_contestants', 'view_contest_scoreboard')}
+    contest_problems = list(contest.contest_problems.all())
+
+    clones = []
+    with Progress(self, len(copies) + 1, stage=_('Cloning contests')) as p:
+        with revisions.create_revision(atomic=True):
+            for spec in copies:
+                # The original is copied as loaded; its state is copied too, so the copies share no cached relations.
+                clone = copy.copy(contest)
+                clone.pk = None
+                clone._state = copy.deepcopy(contest._state)
+                clone._state.adding = True
+                clone.key = spec['key']
+                clone.is_visible = False
+                clone.user_count = 0
+                clone.locked_after = None
+                if spec.get('start_time'):
+                    clone.start_time = parse_datetime(spec['start_time'])
+                if spec.get('end_time'):
+                    clone.end_time = parse_datetime(spec['end_time'])
+                clone.save()
+                clones.append((clone, spec))
+                p.did(1)
+
+            for field, ids in related.items():
+                pairs = []
+                for clone, spec in clones:
+                    override = spec.get(field)
+                    pairs += [(clone.id, related_id) for related_id in (ids if override is None else override)]
+                _bulk_add(field, pairs)
+            _bulk_add('authors', [(clone.id, profile.id) for clone, spec in clones])
+
+            problems = []
+            for clone, spec in clones:
+                for problem in contest_problems:
+                    problem = copy.copy(problem)
+                    problem.pk = None
+                    problem.contest = clone
+                    problems.append(problem)
+            ContestProblem.objects.bulk_create(problems)
+
+            revisions.set_user(profile.user)
+            revisions.set_comment(_('Cloned contest from %s') % contest.key)
+            p.did(1)
+    return [clone.id for clone, spec in clones]
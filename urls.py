@@ -16,7 +16,7 @@ from judge.sitemap import BlogPostSitemap, ContestSitemap, HomePageSitemap, Orga
     SolutionSitemap, UrlSitemap, UserSitemap
 from judge.views import TitledTemplateView, api, blog, comment, contests, language, license, mailgun, organization, \
     preview, problem, problem_manage, ranked_submission, register, stats, status, submission, tasks, ticket, \
-    two_factor, user, widgets, homeworks, exercises, quizs
+    two_factor, user, widgets, coursework
 from judge.views.problem_data import ProblemDataView, ProblemSubmissionDiff, \
     problem_data_file, problem_init_view
 from judge.views.register import ActivationView, RegistrationView
@@ -93,10 +93,10 @@ def exception(request):
     raise RuntimeError('@Xyene asked me to cause this')
 
 
-def paged_list_view(view, name):
+def paged_list_view(view, name, **initkwargs):
     return include([
-        url(r'^$', view.as_view(), name=name),
-        url(r'^(?P<page>\d+)$', view.as_view(), name=name),
+        url(r'^$', view.as_view(**initkwargs), name=name),
+        url(r'^(?P<page>\d+)$', view.as_view(**initkwargs), name=name),
     ])
 
 
@@ -228,11 +228,59 @@ urlpatterns = [
             name='contest_participation_disqualify'),
 
         url(r'^/$', lambda _, contest: HttpResponsePermanentRedirect(reverse('contest_view', args=[contest]))),
-    ])),  
-    
-   url(r'^homeworks/', paged_list_view(homeworks.ContestList, 'contest_list')),
-   url(r'^exercises/', pages_list_view(exercises.ContestList, 'contest_list')),
-   url(r'^quizs/', paged_list_view(quizs.ContestList, 'contest_list')),
+    ])),
+
+    url(r'^coursework/dashboard$', coursework.coursework_dashboard, name='coursework_dashboard'),
+    url(r'^coursework/calendar-feed/regenerate$', coursework.regenerate_calendar_feed_token,
+        name='coursework_calendar_feed_regenerate'),
+    url(r'^homeworks/calendar\.ics$', coursework.contest_calendar_feed, {'kind': coursework.HOMEWORK},
+        name='homework_calendar_feed'),
+    url(r'^homeworks/(?P<year>\d+)/(?P<month>\d+)/$', coursework.ContestCalendar.as_view(kind=coursework.HOMEWORK),
+        name='homework_calendar'),
+    url(r'^homeworks/', paged_list_view(coursework.ContestList, 'homework_list', kind=coursework.HOMEWORK)),
+    url(r'^homework/(?P<contest>\w+)', include([
+        url(r'^$', coursework.ContestDetail.as_view(kind=coursework.HOMEWORK), name='homework_view'),
+        url(r'^/join$', coursework.ContestJoin.as_view(kind=coursework.HOMEWORK), name='homework_join'),
+        url(r'^/leave$', coursework.ContestLeave.as_view(kind=coursework.HOMEWORK), name='homework_leave'),
+        url(r'^/clone$', coursework.ContestClone.as_view(kind=coursework.HOMEWORK), name='homework_clone'),
+        url(r'^/comments$', coursework.ContestCommentsAjax.as_view(kind=coursework.HOMEWORK),
+            name='homework_comments_ajax'),
+        url(r'^/ranking/$', coursework.ContestRanking.as_view(kind=coursework.HOMEWORK), name='homework_ranking'),
+        url(r'^/ranking/ajax$', coursework.contest_ranking_ajax, name='homework_ranking_ajax'),
+        url(r'^/ranking/replay$', coursework.contest_ranking_replay, name='homework_ranking_replay'),
+    ])),
+    url(r'^exercises/calendar\.ics$', coursework.contest_calendar_feed, {'kind': coursework.EXERCISE},
+        name='exercise_calendar_feed'),
+    url(r'^exercises/(?P<year>\d+)/(?P<month>\d+)/$', coursework.ContestCalendar.as_view(kind=coursework.EXERCISE),
+        name='exercise_calendar'),
+    url(r'^exercises/', paged_list_view(coursework.ContestList, 'exercise_list', kind=coursework.EXERCISE)),
+    url(r'^exercise/(?P<contest>\w+)', include([
+        url(r'^$', coursework.ContestDetail.as_view(kind=coursework.EXERCISE), name='exercise_view'),
+        url(r'^/join$', coursework.ContestJoin.as_view(kind=coursework.EXERCISE), name='exercise_join'),
+        url(r'^/leave$', coursework.ContestLeave.as_view(kind=coursework.EXERCISE), name='exercise_leave'),
+        url(r'^/clone$', coursework.ContestClone.as_view(kind=coursework.EXERCISE), name='exercise_clone'),
+        url(r'^/comments$', coursework.ContestCommentsAjax.as_view(kind=coursework.EXERCISE),
+            name='exercise_comments_ajax'),
+        url(r'^/ranking/$', coursework.ContestRanking.as_view(kind=coursework.EXERCISE), name='exercise_ranking'),
+        url(r'^/ranking/ajax$', coursework.contest_ranking_ajax, name='exercise_ranking_ajax'),
+        url(r'^/ranking/replay$', coursework.contest_ranking_replay, name='exercise_ranking_replay'),
+    ])),
+    url(r'^quizs/calendar\.ics$', coursework.contest_calendar_feed, {'kind': coursework.QUIZ},
+        name='quiz_calendar_feed'),
+    url(r'^quizs/(?P<year>\d+)/(?P<month>\d+)/$', coursework.ContestCalendar.as_view(kind=coursework.QUIZ),
+        name='quiz_calendar'),
+    url(r'^quizs/', paged_list_view(coursework.ContestList, 'quiz_list', kind=coursework.QUIZ)),
+    url(r'^quiz/(?P<contest>\w+)', include([
+        url(r'^$', coursework.ContestDetail.as_view(kind=coursework.QUIZ), name='quiz_view'),
+        url(r'^/join$', coursework.ContestJoin.as_view(kind=coursework.QUIZ), name='quiz_join'),
+        url(r'^/leave$', coursework.ContestLeave.as_view(kind=coursework.QUIZ), name='quiz_leave'),
+        url(r'^/clone$', coursework.ContestClone.as_view(kind=coursework.QUIZ), name='quiz_clone'),
+        url(r'^/comments$', coursework.ContestCommentsAjax.as_view(kind=coursework.QUIZ),
+            name='quiz_comments_ajax'),
+        url(r'^/ranking/$', coursework.ContestRanking.as_view(kind=coursework.QUIZ), name='quiz_ranking'),
+        url(r'^/ranking/ajax$', coursework.contest_ranking_ajax, name='quiz_ranking_ajax'),
+        url(r'^/ranking/replay$', coursework.contest_ranking_replay, name='quiz_ranking_replay'),
+    ])),
 
     url(r'^organizations/$', organization.OrganizationList.as_view(), name='organization_list'),
     url(r'^organization/(?P<pk>\d+)-(?P<slug>[\w-]*)', include([
@@ -0,0 +1,95 @@
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+
+from judge.models import Contest, ContestParticipation, Organization, Profile
+
+__all__ = ['CONTEST_KINDS', 'get_contest_dashboard', 'get_upcoming_contests']
+
+# Contest kind to the flag on Contest that marks it.
+CONTEST_KINDS = (
+    ('homework', 'is_homework'),
+    ('exercise', 'is_exercise'),
+    ('quiz', 'is_quiz'),
+)
+
+
+def get_upcoming_contests(user):
+    """Returns the visible contests of every kind that have not ended.
+
+    Each kind is fetched with its own query, which can use the index on its flag and end time, and a contest of
+    several kinds is kept once. The result is cached per user for a short while, so that the homework, exercise and
+    quiz lists opened one after another share it. Contests that ended after the result was cached are dropped by the
+    callers.
+    """
+    key = 'contest_dashboard:%s:%s' % (Contest.get_list_cache_version(),
+                                       user.id if user.is_authenticated else 'anonymous')
+    contests = cache.get(key)
+    if contests is None:
+        now = timezone.now()
+        visible = Contest.get_visible_contests(user)
+        contests = {}
+        for kind, flag in CONTEST_KINDS:
+            for contest in visible.filter(**{flag: True, 'end_time__gte': now}):
+                contests.setdefault(contest.id, contest)
+        contests = list(contests.values())
+        # The lists only show organization names and links, and check editors and testers by identity.
+        prefetch_related_objects(
+            contests,
+            'tags',
+            Prefetch('organizations', queryset=Organization.objects.only('id', 'name', 'slug')),
+            Prefetch('authors', queryset=Profile.objects.only('id')),
+            Prefetch('curators', queryset=Profile.objects.only('id')),
+            Prefetch('testers', queryset=Profile.objects.only('id')),
+        )
+        cache.set(key, contests, getattr(settings, 'DMOJ_CONTEST_DASHBOARD_CACHE_TIMEOUT', 60))
+    return contests
+
+
+def get_contest_dashboard(user, kinds=None, now=None):
+    """Partitions the upcoming contests by kind and by time state.
+
+    Returns a dict of kind to a dict with `active` (the user's ongoing participations), `present` (the other
+    running contests) and `future` contests, sorted as the contest lists show them. The user's participations
+    in the running contests of all the requested kinds are found with a single query.
+    """
+    kinds = kinds or [kind for kind, flag in CONTEST_KINDS]
+    now = now or timezone.now()
+    dashboard = {kind: {'active': [], 'present': [], 'future': []} for kind in kinds}
+
+    running = {}
+    for contest in get_upcoming_contests(user):
+        if contest.end_time < now:
+            continue
+        for kind, flag in CONTEST_KINDS:
+            if kind in dashboard and getattr(contest, flag):
+                if contest.start_time > now:
+                    dashboard[kind]['future'].append(contest)
+                else:
+                    dashboard[kind]['present'].append(contest)
+                    running[contest.id] = contest
+
+    active_ids = set()
+    if user.is_authenticated and running:
+        participations = ContestParticipation.objects.filter(virtual=0, user=user.profile,
+                                                             contest_id__in=running.keys())
+        for participation in participations:
+            # Reuse the contests fetched above rather than loading them again through the participations.
+            participation.contest = running[participation.contest_id]
+            participation.key = participation.contest.key
+            if participation.ended:
+                continue
+            active_ids.add(participation.contest_id)
+            for kind, flag in CONTEST_KINDS:
+                if kind in dashboard and getattr(participation.contest, flag):
+                    dashboard[kind]['active'].append(participation)
+
+    for lists in dashboard.values():
+        lists['present'] = [contest for contest in lists['present'] if contest.id not in active_ids]
+        lists['active'].sort(key=attrgetter('end_time', 'key'))
+        lists['present'].sort(key=attrgetter('end_time', 'key'))
+        lists['future'].sort(key=attrgetter('start_time'))
+    return dashboard
@@ -0,0 +1,177 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from judge.models import ContestParticipation, ContestSubmission
+
+__all__ = ['ScoreTimeline', 'Standing', 'build_score_timeline', 'get_score_timeline', 'refresh_score_timeline',
+           'schedule_score_timeline_refresh']
+
+Standing = namedtuple('Standing', 'points time problems')
+
+
+class ScoreTimeline(object):
+    """Score events of the live participations in a contest, ordered by elapsed time.
+
+    Every event records that a participation's best score on a contest problem improved by `delta`
+    points, `time` seconds into the participation. The events are kept in parallel arrays so that the
+    timeline stays small enough to cache, and a single bisection finds all events up to a given time.
+    """
+
+    def __init__(self):
+        self.times = array('l')
+        self.participations = array('l')
+        self.problems = array('l')
+        self.deltas = array('d')
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, time, participation, problem, delta):
+        if self.times and time < self.times[-1]:
+            raise ValueError('score events must be appended in order of elapsed time')
+        self.times.append(time)
+        self.participations.append(participation)
+        self.problems.append(problem)
+        self.deltas.append(delta)
+
+    def cutoff(self, elapsed):
+        return bisect_right(self.times, elapsed)
+
+    def standings_at(self, elapsed):
+        """Returns a dict of participation id to `Standing` after `elapsed` seconds.
+
+        `Standing.time` is the elapsed time of the participation's last improvement, and
+        `Standing.problems` maps contest problem ids to the best points at that time.
+        """
+        points = defaultdict(float)
+        times = {}
+        problems = defaultdict(dict)
+        for i in range(self.cutoff(elapsed)):
+            participation = self.participations[i]
+            points[participation] += self.deltas[i]
+            times[participation] = self.times[i]
+            problem_points = problems[participation]
+            problem_points[self.problems[i]] = problem_points.get(self.problems[i], 0) + self.deltas[i]
+        return {participation: Standing(score, times[participation], problems[participation])
+                for participation, score in points.items()}
+
+    def frames(self, resolution):
+        """Yields `(elapsed, rows)` every `resolution` seconds until the last score event.
+
+        Rows are `(participation, points, rank)` for every participation whose points or rank changed since
+        the previous frame. Participations are ranked by points, then by the time of their last improvement.
+        The ranking is kept as a sorted list that is updated in place for every event, and only positions
+        between where a participation left and where it was reinserted are re-examined for a frame.
+        """
+        order = []
+        keys = {}
+        emitted = {}
+        count = len(self)
+        last = self.times[-1] if count else 0
+        index = 0
+        for elapsed in range(0, last + resolution, resolution):
+            low = high = None
+            while index < count and self.times[index] <= elapsed:
+                participation = self.participations[index]
+                old = keys.get(participation)
+                points = self.deltas[index] - (old[0] if old else 0)
+                if old is None:
+                    # Every row after a new entry moves down by one.
+                    high = float('inf')
+                else:
+                    position = bisect_left(order, old)
+                    del order[position]
+                    low = position if low is None else min(low, position)
+                    high = position if high is None else max(high, position)
+
+                key = keys[participation] = (-points, self.times[index], participation)
+                position = bisect_left(order, key)
+                order.insert(position, key)
+                low = position if low is None else min(low, position)
+                high = position if high is None else max(high, position)
+                index += 1
+
+            rows = []
+            if low is not None:
+                # Ties share the rank of the first row in their group, so the group just after the range may have
+                # lost or gained a member inside it.
+                high = min(high + 1, len(order) - 1)
+                while high + 1 < len(order) and order[high + 1][:2] == order[high][:2]:
+                    high += 1
+                for position in range(low, high + 1):
+                    negated_points, time, participation = order[position]
+                    row = (-negated_points, bisect_left(order, (negated_points, time)) + 1)
+                    if emitted.get(participation) != row:
+                        emitted[participation] = row
+                        rows.append((participation,) + row)
+            yield elapsed, rows
+
+
+def build_score_timeline(contest):
+    queryset = ContestSubmission.objects.filter(
+        participation__contest=contest, participation__virtual=ContestParticipation.LIVE,
+        participation__is_disqualified=False,
+    ).order_by('submission__date', 'submission_id').values_list(
+        'participation_id', 'problem_id', 'points', 'submission__date', 'participation__real_start',
+    )
+
+    best = {}
+    events = []
+    for participation, problem, points, date, real_start in queryset.iterator():
+        delta = points - best.get((participation, problem), 0)
+        if delta <= 0:
+            continue
+        best[participation, problem] = points
+        start = contest.start_time if contest.time_limit is None else real_start
+        events.append((max(int((date - start).total_seconds()), 0), participation, problem, delta))
+
+    # With a time limit, participations start at different times, so submission order is not elapsed order.
+    events.sort(key=itemgetter(0))
+
+    timeline = ScoreTimeline()
+    for event in events:
+        timeline.append(*event)
+    return timeline
+
+
+def _score_timeline_key(contest):
+    return 'contest_score_timeline:%d' % contest.id
+
+
+def get_score_timeline(contest):
+    key = _score_timeline_key(contest)
+    timeline = cache.get(key)
+    if timeline is None:
+        timeline = build_score_timeline(contest)
+        cache.set(key, timeline, 86400 if contest.ended else 60)
+    return timeline
+
+
+def _refresh_pending_key(contest_id):
+    return 'contest_score_timeline_refresh_pending:%d' % contest_id
+
+
+def refresh_score_timeline(contest):
+    """Rebuilds the cached timeline, replacing one that may have been cached while the contest was running."""
+    # Results graded after the pending flag is cleared schedule another rebuild, so none are missed.
+    cache.delete(_refresh_pending_key(contest.id))
+    timeline = build_score_timeline(contest)
+    cache.set(_score_timeline_key(contest), timeline, 86400 if contest.ended else 60)
+    return timeline
+
+
+def schedule_score_timeline_refresh(contest):
+    """Rebuilds the timeline of an ended contest shortly after its results change.
+
+    A rejudge regrades its submissions one at a time, long after the rejudge task has queued them, so one deferred
+    rebuild covers every result graded until it runs, instead of one per submission.
+    """
+    delay = getattr(settings, 'DMOJ_CONTEST_TIMELINE_REFRESH_DELAY', 60)
+    if cache.add(_refresh_pending_key(contest.id), True, delay * 10):
+        from judge.tasks import refresh_contest_score_timeline
+        refresh_contest_score_timeline.apply_async((contest.id,), countdown=delay)
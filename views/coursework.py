@@ -0,0 +1,1287 @@
+import hashlib
+import json
+from calendar import Calendar, SUNDAY
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, time, timedelta
+from functools import partial
+from itertools import chain
+from operator import attrgetter, itemgetter
+
+from django import forms
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Case, Count, FloatField, IntegerField, Max, Prefetch, Q, Value, When
+from django.db.models.expressions import CombinedExpression
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotModified, \
+    HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.template.defaultfilters import date as date_filter, floatformat
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.utils.http import is_safe_url
+from django.utils.safestring import mark_safe
+from django.utils.timezone import make_aware
+from django.utils.translation import gettext as _, gettext_lazy, ngettext
+from django.views.decorators.http import require_POST
+from django.views.generic import ListView, TemplateView
+from django.views.generic.detail import BaseDetailView, DetailView, SingleObjectMixin, View
+
+from judge import event_poster as event
+from judge.comments import CommentedDetailView
+from judge.models import Comment, Contest, ContestCalendarFeedKey, ContestMoss, ContestParticipation, ContestTag, \
+    Organization, Problem, Profile, Submission
+from judge.tasks import clone_contest, run_moss
+from judge.utils.celery import redirect_to_task_status
+from judge.utils.contest_dashboard import get_contest_dashboard
+from judge.utils.opengraph import generate_opengraph
+from judge.utils.problems import _get_result_data
+from judge.utils.ranker import ranker
+from judge.utils.score_timeline import get_score_timeline
+from judge.utils.stats import get_bar_chart, get_pie_chart
+from judge.utils.views import QueryStringSortMixin, SingleObjectFormView, TitleMixin, generic_message
+
+__all__ = ['ContestKind', 'HOMEWORK', 'EXERCISE', 'QUIZ', 'CONTEST_KINDS', 'ContestList', 'ContestDetail',
+           'ContestCommentsAjax', 'ContestRanking', 'ContestJoin', 'ContestLeave', 'ContestCalendar', 'ContestClone',
+           'ContestStats', 'ContestMossView', 'ContestMossDelete', 'contest_ranking_ajax', 'ContestParticipationList',
+           'ContestParticipationDisqualify', 'get_contest_ranking_list', 'base_contest_ranking_list',
+           'contest_ranking_replay', 'contest_calendar_feed', 'regenerate_calendar_feed_token', 'coursework_dashboard']
+
+# Homework, exercises and quizzes are contests marked by a flag, and share every view below. The views are
+# configured with one of these kinds through `as_view(kind=...)`.
+ContestKind = namedtuple('ContestKind', 'name flag title clone_title not_ongoing_title already_in_title calendar_title')
+
+HOMEWORK = ContestKind(
+    name='homework', flag='is_homework', title=gettext_lazy('Homeworks'), clone_title=gettext_lazy('Clone Homework'),
+    not_ongoing_title=gettext_lazy('Homework not ongoing'), already_in_title=gettext_lazy('Already in Homework'),
+    calendar_title=gettext_lazy('Homeworks in %(month)s'),
+)
+EXERCISE = ContestKind(
+    name='exercise', flag='is_exercise', title=gettext_lazy('Exercises'), clone_title=gettext_lazy('Clone Exercise'),
+    not_ongoing_title=gettext_lazy('Exercise not ongoing'), already_in_title=gettext_lazy('Already in Exercise'),
+    calendar_title=gettext_lazy('Exercises in %(month)s'),
+)
+QUIZ = ContestKind(
+    name='quiz', flag='is_quiz', title=gettext_lazy('Quizs'), clone_title=gettext_lazy('Clone Quiz'),
+    not_ongoing_title=gettext_lazy('Quiz not ongoing'), already_in_title=gettext_lazy('Already in Quiz'),
+    calendar_title=gettext_lazy('Quizs in %(month)s'),
+)
+
+CONTEST_KINDS = {kind.name: kind for kind in (HOMEWORK, EXERCISE, QUIZ)}
+
+
+def _find_contest(request, key, private_check=True):
+    try:
+        contest = Contest.objects.get(key=key)
+        if private_check and not contest.is_accessible_by(request.user):
+            raise ObjectDoesNotExist()
+    except ObjectDoesNotExist:
+        return generic_message(request, _('No such contest'),
+                               _('Could not find a contest with the key "%s".') % key, status=404), False
+    return contest, True
+
+
+class ContestKindMixin(object):
+    kind = None
+
+    def get_context_data(self, **kwargs):
+        context = super(ContestKindMixin, self).get_context_data(**kwargs)
+        context['kind'] = self.kind
+        return context
+
+
+class ContestListMixin(ContestKindMixin):
+    def get_queryset(self):
+        return Contest.get_visible_contests(self.request.user).filter(**{self.kind.flag: True})
+
+
+class ContestList(QueryStringSortMixin, TitleMixin, ContestListMixin, ListView):
+    model = Contest
+    paginate_by = 20
+    template_name = 'coursework/list.html'
+    context_object_name = 'past_contests'
+    all_sorts = frozenset(('name', 'user_count', 'start_time'))
+    default_desc = frozenset(('name', 'user_count'))
+    default_sort = '-start_time'
+
+    @cached_property
+    def _now(self):
+        return timezone.now()
+
+    @cached_property
+    def cursor_salt(self):
+        return '%s_list' % self.kind.name
+
+    def get_title(self):
+        return self.kind.title
+
+    def _get_queryset(self):
+        # The list only shows organization names and links, and checks editors and testers by identity.
+        return super().get_queryset().prefetch_related(
+            'tags',
+            Prefetch('organizations', queryset=Organization.objects.only('id', 'name', 'slug')),
+            Prefetch('authors', queryset=Profile.objects.only('id')),
+            Prefetch('curators', queryset=Profile.objects.only('id')),
+            Prefetch('testers', queryset=Profile.objects.only('id')),
+        )
+
+    def get_queryset(self):
+        return self._get_queryset().filter(end_time__lt=self._now)
+
+    @cached_property
+    def cursor(self):
+        # Past contests are paginated by keyset, continuing after (or before) the sort value and key of a row.
+        for direction in ('after', 'before'):
+            if direction in self.request.GET:
+                try:
+                    order, value, key = signing.loads(self.request.GET[direction], salt=self.cursor_salt)
+                except (signing.BadSignature, ValueError):
+                    return None
+                if order != self.order:
+                    return None
+                if order.lstrip('-') == 'start_time':
+                    value = parse_datetime(value)
+                return direction, value, key
+        return None
+
+    def make_cursor(self, contest):
+        value = getattr(contest, self.order.lstrip('-'))
+        if self.order.lstrip('-') == 'start_time':
+            value = value.isoformat()
+        return signing.dumps([self.order, value, contest.key], salt=self.cursor_salt)
+
+    def paginate_queryset(self, queryset, page_size):
+        field = self.order.lstrip('-')
+        descending = self.order.startswith('-')
+        backward = self.cursor is not None and self.cursor[0] == 'before'
+        if backward:
+            descending = not descending
+
+        # Ties are broken by key in the direction of the sort, so every page is one scan of the (field, key) index.
+        if self.cursor is not None:
+            direction, value, key = self.cursor
+            lookup = '__lt' if descending else '__gt'
+            queryset = queryset.filter(Q(**{field + lookup: value}) | Q(**{field: value, 'key' + lookup: key}))
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + field, prefix + 'key')
+
+        contests = list(queryset[:page_size + 1])
+        has_more = len(contests) > page_size
+        del contests[page_size:]
+        if backward:
+            contests.reverse()
+
+        if backward:
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = self.cursor is not None, has_more
+        return None, None, contests, self.has_previous or self.has_next
+
+    @cached_property
+    def past_count(self):
+        # Counting the distinct visible contests is as slow as a deep page, so the total is cached per user.
+        user = self.request.user
+        key = '%s_past_count:%s' % (self.kind.name, user.id if user.is_authenticated else 'anonymous')
+        count = cache.get(key)
+        if count is None:
+            count = self.get_queryset().count()
+            cache.set(key, count, 600)
+        return count
+
+    def get_page_href(self, direction, contest):
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[direction] = self.make_cursor(contest)
+        return '%s?%s#past-contests' % (self.request.path, query.urlencode())
+
+    def get_context_data(self, **kwargs):
+        context = super(ContestList, self).get_context_data(**kwargs)
+        # The running and upcoming contests of every kind are fetched and cached together.
+        dashboard = get_contest_dashboard(self.request.user, [self.kind.name], self._now)[self.kind.name]
+        active, present, future = dashboard['active'], dashboard['present'], dashboard['future']
+        context['active_participations'] = active
+        context['current_contests'] = present
+        context['future_contests'] = future
+        context['now'] = self._now
+
+        past = context['past_contests']
+        context['past_count'] = self.past_count
+        context['previous_page_href'] = self.get_page_href('before', past[0]) if past and self.has_previous else None
+        context['next_page_href'] = self.get_page_href('after', past[-1]) if past and self.has_next else None
+        context['calendar_feed_url'] = reverse('%s_calendar_feed' % self.kind.name)
+        if self.request.user.is_authenticated:
+            context['calendar_feed_url'] += '?token=' + get_calendar_feed_token(self.request.profile)
+        context.update(self.get_sort_context())
+        return context
+
+
+class PrivateContestError(Exception):
+    def __init__(self, name, is_private, is_organization_private, orgs):
+        self.name = name
+        self.is_private = is_private
+        self.is_organization_private = is_organization_private
+        self.orgs = orgs
+
+
+class ContestMixin(ContestKindMixin):
+    context_object_name = 'contest'
+    model = Contest
+    slug_field = 'key'
+    slug_url_kwarg = 'contest'
+
+    @cached_property
+    def is_editor(self):
+        if not self.request.user.is_authenticated:
+            return False
+        return self.request.profile.id in self.object.editor_ids
+
+    @cached_property
+    def is_tester(self):
+        if not self.request.user.is_authenticated:
+            return False
+        return self.request.profile.id in self.object.tester_ids
+
+    @cached_property
+    def can_edit(self):
+        return self.object.is_editable_by(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super(ContestMixin, self).get_context_data(**kwargs)
+        if self.request.user.is_authenticated:
+            try:
+                context['live_participation'] = (
+                    self.request.profile.contest_history.get(
+                        contest=self.object,
+                        virtual=ContestParticipation.LIVE,
+                    )
+                )
+            except ContestParticipation.DoesNotExist:
+                context['live_participation'] = None
+                context['has_joined'] = False
+            else:
+                context['has_joined'] = True
+        else:
+            context['live_participation'] = None
+            context['has_joined'] = False
+
+        context['now'] = timezone.now()
+        context['is_editor'] = self.is_editor
+        context['is_tester'] = self.is_tester
+        context['can_edit'] = self.can_edit
+
+        context['meta_description'], context['og_image'], context['logo_override_image'] = self.contest_metadata
+        context['has_moss_api_key'] = settings.MOSS_API_KEY is not None
+
+        return context
+
+    @cached_property
+    def contest_metadata(self):
+        contest = self.object
+        key = 'contest_metadata:%d:%s' % (contest.id, contest.cache_version)
+        metadata = cache.get(key)
+        if metadata is None:
+            if not contest.og_image or not contest.summary:
+                generated = generate_opengraph('generated-meta-contest:%d' % contest.id, contest.description, 'contest')
+            logo_override_image = contest.logo_override_image
+            if not logo_override_image:
+                organizations = list(contest.organizations.all()[:2])
+                if len(organizations) == 1:
+                    logo_override_image = organizations[0].logo_override_image
+            metadata = (contest.summary or generated[0], contest.og_image or generated[1], logo_override_image)
+            cache.set(key, metadata, 3600)
+        return metadata
+
+    def get_queryset(self):
+        queryset = super(ContestMixin, self).get_queryset()
+        if self.kind is not None:
+            queryset = queryset.filter(**{self.kind.flag: True})
+        return queryset
+
+    def get_object(self, queryset=None):
+        contest = super(ContestMixin, self).get_object(queryset)
+
+        profile = self.request.profile
+        if (profile is not None and
+                ContestParticipation.objects.filter(id=profile.current_contest_id, contest_id=contest.id).exists()):
+            return contest
+
+        try:
+            contest.access_check(self.request.user)
+        except Contest.PrivateContest:
+            raise PrivateContestError(contest.name, contest.is_private, contest.is_organization_private,
+                                      contest.organizations.all())
+        except Contest.Inaccessible:
+            raise Http404()
+        else:
+            return contest
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super(ContestMixin, self).dispatch(request, *args, **kwargs)
+        except Http404:
+            key = kwargs.get(self.slug_url_kwarg, None)
+            if key:
+                return generic_message(request, _('No such contest'),
+                                       _('Could not find a contest with the key "%s".') % key)
+            else:
+                return generic_message(request, _('No such contest'),
+                                       _('Could not find such contest.'))
+        except PrivateContestError as e:
+            return render(request, 'contest/private.html', {
+                'error': e, 'title': _('Access to contest "%s" denied') % e.name,
+            }, status=403)
+
+
+class LazyCommentedDetailView(CommentedDetailView):
+    lazy_comments = False
+
+    def get_context_data(self, **kwargs):
+        if not self.lazy_comments:
+            context = super().get_context_data(**kwargs)
+        else:
+            # Skip the comment queries entirely; the page fetches the comments on demand.
+            context = super(CommentedDetailView, self).get_context_data(**kwargs)
+        context['lazy_comments'] = self.lazy_comments
+        return context
+
+
+class ContestDetail(ContestMixin, TitleMixin, LazyCommentedDetailView):
+    template_name = 'coursework/contest.html'
+
+    def get_comment_page(self):
+        return 'c:%s' % self.object.key
+
+    @cached_property
+    def lazy_comments(self):
+        return self.object.use_clarifications or getattr(settings, 'DMOJ_CONTEST_LAZY_COMMENTS', False)
+
+    def get_title(self):
+        return self.object.name
+
+    @cached_property
+    def viewer_role(self):
+        # The contest body is cached per role, as only editors and testers see the problems before the end.
+        user = self.request.user
+        if not user.is_authenticated:
+            return 'anonymous'
+        if user.is_superuser or self.is_editor or self.is_tester:
+            return 'editor'
+        return 'participant'
+
+    def get_context_data(self, **kwargs):
+        context = super(ContestDetail, self).get_context_data(**kwargs)
+        context['viewer_role'] = self.viewer_role
+        context['contest_problems'] = [contest_problem.problem for contest_problem in self.object.problem_manifest]
+        # The manifest is cached for a day, but the AC rates and user counts change with every submission. They are
+        # only shown once the problem table is.
+        stats = {}
+        if self.object.ended or self.viewer_role == 'editor':
+            stats = {problem_id: (ac_rate, user_count) for problem_id, ac_rate, user_count in
+                     Problem.objects.filter(id__in=[problem.id for problem in context['contest_problems']])
+                                    .values_list('id', 'ac_rate', 'user_count')}
+        for problem in context['contest_problems']:
+            problem.i18n_name = problem.i18n_names.get(self.request.LANGUAGE_CODE)
+            problem.ac_rate, problem.user_count = stats.get(problem.id, (0, 0))
+        context['contest_has_public_editorials'] = any(
+            problem.is_public and problem.has_public_editorial for problem in context['contest_problems']
+        )
+        return context
+
+
+class ContestCommentsAjax(ContestMixin, CommentedDetailView):
+    template_name = 'coursework/comments.html'
+    paginate_by = 20
+
+    def get_comment_page(self):
+        return 'c:%s' % self.object.key
+
+    @cached_property
+    def page_number(self):
+        try:
+            return max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            return 1
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        # Anonymous users all see the same comments, without votes or the comment form.
+        key = 'contest_comments:%s:%d' % (kwargs[self.slug_url_kwarg], self.page_number)
+        content = cache.get(key)
+        if content is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = response.render().content
+            cache.set(key, content, 60)
+        return HttpResponse(content)
+
+    def get_context_data(self, **kwargs):
+        # Only the comments are rendered, so skip the contest page context from ContestMixin.
+        context = super(ContestMixin, self).get_context_data(**kwargs)
+
+        # Each root comment has its own tree, so a page of roots is a page of trees.
+        roots = Comment.objects.filter(page=self.get_comment_page(), hidden=False, parent=None) \
+                               .order_by('-time').values_list('tree_id', flat=True)
+        page = Paginator(roots, self.paginate_by).get_page(self.page_number)
+        context['comment_list'] = context['comment_list'].filter(tree_id__in=list(page))
+        context['page_obj'] = page
+        if page.number > 1:
+            context['comment_form'] = None
+        return context
+
+
+class ContestMultiCloneForm(forms.Form):
+    copies = forms.CharField(widget=forms.Textarea(attrs={'rows': 8}))
+
+    def __init__(self, *args, contest, **kwargs):
+        super(ContestMultiCloneForm, self).__init__(*args, **kwargs)
+        self.contest = contest
+
+    def _parse_time(self, value, line):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise forms.ValidationError(_('Invalid time "%(time)s" on line %(line)d.') % {'time': value, 'line': line})
+        return parsed if timezone.is_aware(parsed) else make_aware(parsed)
+
+    def clean_copies(self):
+        """Parses one copy per line: a key, then optionally a start time, an end time and organization ids, separated
+        by commas. The organization ids are separated by spaces; empty times or organizations keep the original's."""
+        copies = []
+        organization_ids = set()
+        for line, text in enumerate(self.cleaned_data['copies'].splitlines(), 1):
+            parts = [part.strip() for part in text.split(',')]
+            if not parts[0]:
+                continue
+            if len(parts) > 4:
+                raise forms.ValidationError(_('Too many fields on line %d.') % line)
+            parts += [''] * (4 - len(parts))
+            key, start_time, end_time, organizations = parts
+
+            try:
+                Contest._meta.get_field('key').run_validators(key)
+            except forms.ValidationError as e:
+                raise forms.ValidationError(_('Invalid key "%(key)s" on line %(line)d: %(error)s') %
+                                            {'key': key, 'line': line, 'error': ' '.join(e.messages)})
+            start_time = self._parse_time(start_time, line) if start_time else self.contest.start_time
+            end_time = self._parse_time(end_time, line) if end_time else self.contest.end_time
+            if start_time >= end_time:
+                raise forms.ValidationError(_('The copy on line %d would end before it starts.') % line)
+
+            copy = {'key': key, 'start_time': start_time.isoformat(), 'end_time': end_time.isoformat()}
+            if organizations:
+                try:
+                    copy['organizations'] = [int(organization) for organization in organizations.split()]
+                except ValueError:
+                    raise forms.ValidationError(_('Invalid organization ids on line %d.') % line)
+                organization_ids.update(copy['organizations'])
+            copies.append(copy)
+
+        if not copies:
+            raise forms.ValidationError(_('Enter at least one copy.'))
+        keys = [copy['key'] for copy in copies]
+        if len(set(keys)) != len(keys):
+            raise forms.ValidationError(_('Each copy must have a different key.'))
+        taken = list(Contest.objects.filter(key__in=keys).values_list('key', flat=True))
+        if taken:
+            raise forms.ValidationError(_('Contest id(s) already in use: %s') % ', '.join(sorted(taken)))
+        if Organization.objects.filter(id__in=organization_ids).count() != len(organization_ids):
+            raise forms.ValidationError(_('Some of the organization ids do not exist.'))
+        return copies
+
+
+class ContestClone(ContestMixin, PermissionRequiredMixin, TitleMixin, SingleObjectFormView):
+    template_name = 'coursework/clone.html'
+    form_class = ContestMultiCloneForm
+    permission_required = 'judge.clone_contest'
+
+    def get_title(self):
+        return self.kind.clone_title
+
+    def get_form_kwargs(self):
+        kwargs = super(ContestClone, self).get_form_kwargs()
+        kwargs['contest'] = self.object
+        return kwargs
+
+    def form_valid(self, form):
+        copies = form.cleaned_data['copies']
+        # Copying many contests with all their problems and users is too slow for a request.
+        status = clone_contest.delay(self.object.id, copies, self.request.profile.id)
+        return redirect_to_task_status(
+            status, message=ngettext('Cloning %(contest)s into %(count)d contest...',
+                                     'Cloning %(contest)s into %(count)d contests...',
+                                     len(copies)) % {'contest': self.object.name, 'count': len(copies)},
+            redirect='%s?q=%s' % (reverse('admin:judge_contest_changelist'), copies[0]['key']),
+        )
+
+
+class ContestAccessDenied(Exception):
+    pass
+
+
+class ContestAccessCodeForm(forms.Form):
+    access_code = forms.CharField(max_length=255)
+
+    def __init__(self, *args, **kwargs):
+        super(ContestAccessCodeForm, self).__init__(*args, **kwargs)
+        self.fields['access_code'].widget.attrs.update({'autocomplete': 'off'})
+
+
+class ContestJoin(LoginRequiredMixin, ContestMixin, BaseDetailView):
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return self.ask_for_access_code()
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        try:
+            return self.join_contest(request)
+        except ContestAccessDenied:
+            if request.POST.get('access_code'):
+                return self.ask_for_access_code(ContestAccessCodeForm(request.POST))
+            else:
+                return HttpResponseRedirect(request.path)
+
+    def join_contest(self, request, access_code=None):
+        contest = self.object
+
+        if not contest.can_join and not (self.is_editor or self.is_tester):
+            return generic_message(request, self.kind.not_ongoing_title,
+                                   _('"%s" is not currently ongoing.') % contest.name)
+
+        profile = request.profile
+        if profile.current_contest is not None and profile.current_contest.contest_id == contest.id and \
+                not profile.current_contest.ended:
+            # Pre-registered users may already have been put in the contest.
+            return HttpResponseRedirect(reverse('problem_list'))
+        if profile.current_contest is not None:
+            return generic_message(request, self.kind.already_in_title,
+                                   _('You are already in a contest: "%s".') % profile.current_contest.contest.name)
+
+        if not request.user.is_superuser and profile.id in contest.banned_user_ids:
+            return generic_message(request, _('Banned from joining'),
+                                   _('You have been declared persona non grata for this contest. '
+                                     'You are permanently barred from joining this contest.'))
+
+        requires_access_code = (not self.can_edit and contest.access_code and access_code != contest.access_code)
+        if contest.ended:
+            if requires_access_code:
+                raise ContestAccessDenied()
+
+            with transaction.atomic():
+                # Locking the user's own profile row serializes their virtual joins, so the next id is free
+                # without retrying on a conflict, while other users' joins do not wait.
+                Profile.objects.select_for_update().only('id').get(id=profile.id)
+                virtual_id = (ContestParticipation.objects.filter(contest=contest, user=profile)
+                              .aggregate(virtual_id=Max('virtual'))['virtual_id'] or 0) + 1
+                participation = ContestParticipation.objects.create(
+                    contest=contest, user=profile, virtual=max(virtual_id, 1),
+                    real_start=timezone.now(),
+                )
+        else:
+            SPECTATE = ContestParticipation.SPECTATE
+            LIVE = ContestParticipation.LIVE
+            try:
+                participation = ContestParticipation.objects.get(
+                    contest=contest, user=profile, virtual=(SPECTATE if self.is_editor or self.is_tester else LIVE),
+                )
+            except ContestParticipation.DoesNotExist:
+                if requires_access_code:
+                    raise ContestAccessDenied()
+
+                participation = ContestParticipation.objects.create(
+                    contest=contest, user=profile, virtual=(SPECTATE if self.is_editor or self.is_tester else LIVE),
+                    real_start=timezone.now(),
+                )
+                if participation.virtual == LIVE:
+                    # Only new live participations change the user count, which is recounted once per storm.
+                    transaction.on_commit(contest.schedule_user_count_update)
+            else:
+                if participation.ended:
+                    participation = ContestParticipation.objects.get_or_create(
+                        contest=contest, user=profile, virtual=SPECTATE,
+                        defaults={'real_start': timezone.now()},
+                    )[0]
+
+        profile.current_contest = participation
+        profile.save(update_fields=['current_contest'])
+        return HttpResponseRedirect(reverse('problem_list'))
+
+    def ask_for_access_code(self, form=None):
+        contest = self.object
+        wrong_code = False
+        if form:
+            if form.is_valid():
+                if form.cleaned_data['access_code'] == contest.access_code:
+                    return self.join_contest(self.request, form.cleaned_data['access_code'])
+                wrong_code = True
+        else:
+            form = ContestAccessCodeForm()
+        return render(self.request, 'coursework/access_code.html', {
+            'form': form, 'wrong_code': wrong_code,
+            'title': _('Enter access code for "%s"') % contest.name,
+        })
+
+
+class ContestLeave(LoginRequiredMixin, ContestMixin, BaseDetailView):
+    def post(self, request, *args, **kwargs):
+        contest = self.get_object()
+
+        profile = request.profile
+        if profile.current_contest is None or profile.current_contest.contest_id != contest.id:
+            return generic_message(request, _('No such contest'),
+                                   _('You are not in contest "%s".') % contest.key, 404)
+
+        profile.remove_contest()
+        return HttpResponseRedirect(reverse('%s_view' % self.kind.name, args=(contest.key,)))
+
+
+ContestDay = namedtuple('ContestDay', 'date weekday is_pad is_today starts ends oneday')
+
+
+class ContestCalendar(TitleMixin, ContestListMixin, TemplateView):
+    firstweekday = SUNDAY
+    weekday_classes = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+    template_name = 'coursework/calendar.html'
+
+    def get(self, request, *args, **kwargs):
+        try:
+            self.year = int(kwargs['year'])
+            self.month = int(kwargs['month'])
+        except (KeyError, ValueError):
+            raise ImproperlyConfigured(_('ContestCalendar requires integer year and month'))
+        self.today = timezone.now().date()
+        return self.render()
+
+    def render(self):
+        context = self.get_context_data()
+        return self.render_to_response(context)
+
+    def get_contest_data(self, start, end):
+        end += timedelta(days=1)
+        # Every contest that overlaps the window, including those that start before it and end after it. Scanning
+        # the kind's (end_time, start_time) index from the start of the window answers this with one range.
+        contests = self.get_queryset().filter(start_time__lt=end, end_time__gte=start)
+        starts, ends, oneday = (defaultdict(list) for i in range(3))
+        spanning = []
+        for contest in contests:
+            start_date = timezone.localtime(contest.start_time).date()
+            end_date = timezone.localtime(contest.end_time - timedelta(seconds=1)).date()
+            if start_date == end_date:
+                oneday[start_date].append(contest)
+            elif contest.start_time < start and contest.end_time >= end:
+                spanning.append(contest)
+            else:
+                starts[start_date].append(contest)
+                ends[end_date].append(contest)
+        return starts, ends, oneday, spanning
+
+    def get_table(self):
+        # Users of the same visibility class see the same month, so the table is shared between them until a
+        # contest changes. The rendered page is not cached, as it carries the user's own header.
+        key = 'contest_calendar_month:%s:%s:%s:%d:%d:%s:%s' % (
+            self.kind.name, Contest.get_list_cache_version(), Contest.get_visibility_class(self.request.user),
+            self.year, self.month, self.today.isoformat(), timezone.get_current_timezone_name(),
+        )
+        table = cache.get(key)
+        if table is None:
+            calendar = Calendar(self.firstweekday).monthdatescalendar(self.year, self.month)
+            starts, ends, oneday, spanning = self.get_contest_data(
+                make_aware(datetime.combine(calendar[0][0], time.min)),
+                make_aware(datetime.combine(calendar[-1][-1], time.min)),
+            )
+            table = [[ContestDay(
+                date=date, weekday=self.weekday_classes[weekday], is_pad=date.month != self.month,
+                is_today=date == self.today, starts=starts[date], ends=ends[date], oneday=oneday[date],
+            ) for weekday, date in enumerate(week)] for week in calendar], spanning
+            cache.set(key, table, 86400)
+        return table
+
+    def get_context_data(self, **kwargs):
+        context = super(ContestCalendar, self).get_context_data(**kwargs)
+
+        try:
+            month = date(self.year, self.month, 1)
+        except ValueError:
+            raise Http404()
+        else:
+            context['title'] = self.kind.calendar_title % {'month': date_filter(month, _("F Y"))}
+
+        min_date, max_date = Contest.get_calendar_bounds()
+        min_month = (self.today.year, self.today.month)
+        if min_date is not None:
+            min_month = min_date.year, min_date.month
+        max_month = (self.today.year, self.today.month)
+        if max_date is not None:
+            max_month = max((max_date.year, max_date.month), (self.today.year, self.today.month))
+
+        month = (self.year, self.month)
+        if month < min_month or month > max_month:
+            # 404 is valid because it merely declares the lack of existence, without any reason
+            raise Http404()
+
+        context['now'] = timezone.now()
+        context['calendar'], context['spanning_contests'] = self.get_table()
+        context['curr_month'] = date(self.year, self.month, 1)
+
+        if month > min_month:
+            context['prev_month'] = date(self.year - (self.month == 1), 12 if self.month == 1 else self.month - 1, 1)
+        else:
+            context['prev_month'] = None
+
+        if month < max_month:
+            context['next_month'] = date(self.year + (self.month == 12), 1 if self.month == 12 else self.month + 1, 1)
+        else:
+            context['next_month'] = None
+        return context
+
+
+def get_calendar_feed_token(profile):
+    return ContestCalendarFeedKey.get_key(profile)
+
+
+@login_required
+@require_POST
+def regenerate_calendar_feed_token(request):
+    ContestCalendarFeedKey.regenerate(request.profile)
+    next_url = request.POST.get('next')
+    if not next_url or not is_safe_url(next_url, allowed_hosts={request.get_host()}):
+        next_url = reverse('home')
+    return HttpResponseRedirect(next_url)
+
+
+def _ics_escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_time(value):
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _ics_lines(*lines):
+    # Lines longer than 75 octets are folded, continuing after a space (RFC 5545, section 3.1).
+    folded = []
+    for line in lines:
+        encoded = line.encode('utf-8')
+        chunks = []
+        while len(encoded) > (74 if chunks else 75):
+            cut = 74 if chunks else 75
+            while encoded[cut] & 0xC0 == 0x80:
+                cut -= 1
+            chunks.append(encoded[:cut])
+            encoded = encoded[cut:]
+        chunks.append(encoded)
+        folded.append(b'\r\n '.join(chunks).decode('utf-8') + '\r\n')
+    return ''.join(folded)
+
+
+def contest_calendar_feed_chunks(request, kind, contests):
+    host = request.get_host()
+    stamp = _ics_time(timezone.now())
+    yield _ics_lines('BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//%s//%s//EN' % (host, kind.name),
+                     'X-WR-CALNAME:' + _ics_escape(str(kind.title)))
+    for contest in contests.iterator():
+        yield _ics_lines(
+            'BEGIN:VEVENT',
+            'UID:%s-%s@%s' % (kind.name, contest.key, host),
+            'DTSTAMP:' + stamp,
+            'DTSTART:' + _ics_time(contest.start_time),
+            'DTEND:' + _ics_time(contest.end_time),
+            'SUMMARY:' + _ics_escape(contest.name),
+            'URL:' + request.build_absolute_uri(reverse('%s_view' % kind.name, args=(contest.key,))),
+            'END:VEVENT',
+        )
+    yield _ics_lines('END:VCALENDAR')
+
+
+def _caching_stream(key, chunks, timeout):
+    content = []
+    for chunk in chunks:
+        content.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(content), timeout)
+
+
+def contest_calendar_feed(request, kind):
+    # Calendar clients cannot log in, so the feed of a user is addressed by a secret key, which they can regenerate.
+    # Both the owner of a key and their visibility class are cached, so that an unchanged feed costs no queries.
+    if 'token' in request.GET:
+        user_id = ContestCalendarFeedKey.get_user_id(request.GET['token'])
+        if user_id is None:
+            raise Http404()
+        try:
+            visibility = Contest.get_visibility_class_by_id(user_id)
+        except ObjectDoesNotExist:
+            raise Http404()
+    else:
+        user_id = None
+        visibility = Contest.get_visibility_class(request.user)
+
+    # Users who see the same contests share a feed, which only changes when a contest does, or once a day
+    # as old contests drop out of it.
+    today = timezone.now().date()
+    key = 'contest_calendar_feed:%s:%s:%s:%s' % (kind.name, Contest.get_list_cache_version(), visibility,
+                                                 today.isoformat())
+    etag = '"%s"' % hashlib.md5(key.encode()).hexdigest()
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    content_type = 'text/calendar; charset=utf-8'
+    content = cache.get(key)
+    if content is not None:
+        response = HttpResponse(content, content_type=content_type)
+    else:
+        user = request.user if user_id is None else get_object_or_404(User, id=user_id)
+        since = timezone.now() - timedelta(days=getattr(settings, 'DMOJ_CONTEST_CALENDAR_FEED_DAYS', 30))
+        contests = Contest.get_visible_contests(user).filter(**{kind.flag: True, 'end_time__gte': since}) \
+                          .only('key', 'name', 'start_time', 'end_time').order_by('end_time')
+        response = StreamingHttpResponse(
+            _caching_stream(key, contest_calendar_feed_chunks(request, kind, contests), 86400),
+            content_type=content_type,
+        )
+    response['ETag'] = etag
+    return response
+
+
+class ContestStats(TitleMixin, ContestMixin, DetailView):
+    template_name = 'coursework/stats.html'
+
+    def get_title(self):
+        return _('%s Statistics') % self.object.name
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        if not (self.object.ended or self.can_edit):
+            raise Http404()
+
+        queryset = Submission.objects.filter(contest_object=self.object)
+
+        ac_count = Count(Case(When(result='AC', then=Value(1)), output_field=IntegerField()))
+        ac_rate = CombinedExpression(ac_count / Count('problem'), '*', Value(100.0), output_field=FloatField())
+
+        status_count_queryset = list(
+            queryset.values('problem__code', 'result').annotate(count=Count('result'))
+                    .values_list('problem__code', 'result', 'count'),
+        )
+        labels, codes = [], []
+        contest_problems = [(contest_problem.problem.name, contest_problem.problem.code)
+                            for contest_problem in self.object.problem_manifest]
+        if contest_problems:
+            labels, codes = zip(*contest_problems)
+        num_problems = len(labels)
+        status_counts = [[] for i in range(num_problems)]
+        for problem_code, result, count in status_count_queryset:
+            if problem_code in codes:
+                status_counts[codes.index(problem_code)].append((result, count))
+
+        result_data = defaultdict(partial(list, [0] * num_problems))
+        for i in range(num_problems):
+            for category in _get_result_data(defaultdict(int, status_counts[i]))['categories']:
+                result_data[category['code']][i] = category['count']
+
+        stats = {
+            'problem_status_count': {
+                'labels': labels,
+                'datasets': [
+                    {
+                        'label': name,
+                        'backgroundColor': settings.DMOJ_STATS_SUBMISSION_RESULT_COLORS[name],
+                        'data': data,
+                    }
+                    for name, data in result_data.items()
+                ],
+            },
+            'problem_ac_rate': get_bar_chart(
+                queryset.values('contest__problem__order', 'problem__name').annotate(ac_rate=ac_rate)
+                        .order_by('contest__problem__order').values_list('problem__name', 'ac_rate'),
+            ),
+            'language_count': get_pie_chart(
+                queryset.values('language__name').annotate(count=Count('language__name'))
+                        .filter(count__gt=0).order_by('-count').values_list('language__name', 'count'),
+            ),
+            'language_ac_rate': get_bar_chart(
+                queryset.values('language__name').annotate(ac_rate=ac_rate)
+                        .filter(ac_rate__gt=0).values_list('language__name', 'ac_rate'),
+            ),
+        }
+
+        context['stats'] = mark_safe(json.dumps(stats))
+
+        return context
+
+
+ContestRankingProfile = namedtuple(
+    'ContestRankingProfile',
+    'id user css_class username points cumtime tiebreaker organization participation '
+    'participation_rating problem_cells result_cell',
+)
+
+BestSolutionData = namedtuple('BestSolutionData', 'code points time state is_pretested')
+
+
+def make_contest_ranking_profile(contest, participation, contest_problems):
+    def display_user_problem(contest_problem):
+        # When the contest format is changed, `format_data` might be invalid.
+        # This will cause `display_user_problem` to error, so we display '???' instead.
+        try:
+            return contest.format.display_user_problem(participation, contest_problem)
+        except (KeyError, TypeError, ValueError):
+            return mark_safe('<td>???</td>')
+
+    user = participation.user
+    return ContestRankingProfile(
+        id=user.id,
+        user=user.user,
+        css_class=user.css_class,
+        username=user.username,
+        points=participation.score,
+        cumtime=participation.cumtime,
+        tiebreaker=participation.tiebreaker,
+        organization=user.organization,
+        participation_rating=participation.rating.rating if hasattr(participation, 'rating') else None,
+        problem_cells=[display_user_problem(contest_problem) for contest_problem in contest_problems],
+        result_cell=contest.format.display_participation_result(participation),
+        participation=participation,
+    )
+
+
+def base_contest_ranking_list(contest, problems, queryset):
+    return [make_contest_ranking_profile(contest, participation, problems) for participation in
+            queryset.select_related('user__user', 'rating').defer('user__about', 'user__organizations__about')]
+
+
+def contest_ranking_list(contest, problems):
+    return base_contest_ranking_list(contest, problems, contest.users.filter(virtual=0)
+                                     .prefetch_related('user__organizations')
+                                     .order_by('is_disqualified', '-score', 'cumtime', 'tiebreaker'))
+
+
+def contest_ranking_at(contest, problems, users, elapsed):
+    """Replaces the live results in `users` with the standings `elapsed` seconds into the contest."""
+    def display_points(points):
+        return floatformat(points, -contest.points_precision)
+
+    standings = get_score_timeline(contest).standings_at(elapsed)
+    ranking = []
+    for user in users:
+        if user.participation.is_disqualified:
+            ranking.append(user)
+            continue
+        standing = standings.get(user.participation.id)
+        points, time, problem_points = standing or (0, 0, {})
+        ranking.append(user._replace(
+            points=round(points, contest.points_precision),
+            cumtime=time,
+            tiebreaker=0,
+            problem_cells=[
+                format_html('<td class="problem-score-col">{0}</td>', display_points(problem_points[problem.id]))
+                if problem.id in problem_points else mark_safe('<td class="problem-score-col"></td>')
+                for problem in problems
+            ],
+            result_cell=format_html('<td class="user-points">{0}</td>', display_points(points)),
+        ))
+    ranking.sort(key=lambda user: (user.participation.is_disqualified, -user.points, user.cumtime))
+    return ranking
+
+
+def get_ranking_elapsed(request):
+    try:
+        return max(int(request.GET['elapsed']), 0)
+    except (KeyError, ValueError):
+        return None
+
+
+def get_contest_ranking_list(request, contest, participation=None, ranking_list=contest_ranking_list,
+                             show_current_virtual=True, ranker=ranker, elapsed=None):
+    problems = list(contest.problem_manifest)
+
+    if show_current_virtual:
+        if participation is None and request.user.is_authenticated:
+            participation = request.profile.current_contest
+            if participation is None or participation.contest_id != contest.id:
+                participation = None
+        # Virtual participants are compared against the live standings at the same point in the contest.
+        if participation is not None and participation.virtual > 0 and elapsed is None:
+            end = min(timezone.now(), participation.end_time)
+            elapsed = max(int((end - participation.start).total_seconds()), 0)
+    else:
+        participation = None
+
+    users = ranking_list(contest, problems)
+    if elapsed is not None:
+        users = contest_ranking_at(contest, problems, users, elapsed)
+    users = ranker(users, key=attrgetter('points', 'cumtime', 'tiebreaker'))
+
+    if participation is not None and participation.virtual:
+        users = chain([('-', make_contest_ranking_profile(contest, participation, problems))], users)
+    return users, problems
+
+
+def contest_ranking_ajax(request, contest, participation=None):
+    contest, exists = _find_contest(request, contest)
+    if not exists:
+        return HttpResponseBadRequest('Invalid contest', content_type='text/plain')
+
+    if not contest.can_see_full_scoreboard(request.user):
+        raise Http404()
+
+    users, problems = get_contest_ranking_list(request, contest, participation, elapsed=get_ranking_elapsed(request))
+    return render(request, 'coursework/ranking-table.html', {
+        'users': users,
+        'problems': problems,
+        'contest': contest,
+        'has_rating': contest.ratings.exists(),
+    })
+
+
+def contest_replay_lines(contest, resolution):
+    timeline = get_score_timeline(contest)
+    usernames = dict(contest.users.filter(virtual=ContestParticipation.LIVE)
+                     .values_list('id', 'user__user__username'))
+    yield json.dumps({'contest': contest.key, 'resolution': resolution, 'participations': usernames}) + '\n'
+    for elapsed, rows in timeline.frames(resolution):
+        yield json.dumps({'elapsed': elapsed, 'rows': rows}) + '\n'
+
+
+def contest_ranking_replay(request, contest):
+    contest, exists = _find_contest(request, contest)
+    if not exists:
+        return HttpResponseBadRequest('Invalid contest', content_type='text/plain')
+
+    if not contest.can_see_full_scoreboard(request.user):
+        raise Http404()
+
+    duration = int((contest.time_limit or contest.contest_window_length).total_seconds())
+    frames = getattr(settings, 'DMOJ_CONTEST_REPLAY_FRAMES', 300)
+    try:
+        resolution = int(request.GET.get('resolution', duration // frames))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid resolution', content_type='text/plain')
+    resolution = max(resolution, duration // getattr(settings, 'DMOJ_CONTEST_REPLAY_MAX_FRAMES', 1000), 1)
+
+    content_type = 'application/x-ndjson'
+    if not contest.ended:
+        return StreamingHttpResponse(contest_replay_lines(contest, resolution), content_type=content_type)
+
+    # Once the contest is over, the frames only change if it is rescored, which changes its cache version.
+    key = 'contest_replay:%d:%s:%d' % (contest.id, contest.cache_version, resolution)
+    content = cache.get(key)
+    if content is None:
+        content = ''.join(contest_replay_lines(contest, resolution))
+        cache.set(key, content, 86400)
+    return HttpResponse(content, content_type=content_type)
+
+
+class ContestRankingBase(ContestMixin, TitleMixin, DetailView):
+    template_name = 'coursework/ranking.html'
+    tab = None
+
+    def get_title(self):
+        raise NotImplementedError()
+
+    def get_content_title(self):
+        return self.object.name
+
+    def get_ranking_list(self):
+        raise NotImplementedError()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        if not self.object.can_see_own_scoreboard(self.request.user):
+            raise Http404()
+
+        users, problems = self.get_ranking_list()
+        context['users'] = users
+        context['problems'] = problems
+        context['last_msg'] = event.last()
+        context['tab'] = self.tab
+        return context
+
+
+class ContestRanking(ContestRankingBase):
+    tab = 'ranking'
+
+    def get_title(self):
+        return _('%s Rankings') % self.object.name
+
+    def get_ranking_list(self):
+        if not self.object.can_see_full_scoreboard(self.request.user):
+            queryset = self.object.users.filter(user=self.request.profile, virtual=ContestParticipation.LIVE)
+            return get_contest_ranking_list(
+                self.request, self.object,
+                ranking_list=partial(base_contest_ranking_list, queryset=queryset),
+                ranker=lambda users, key: ((_('???'), user) for user in users),
+            )
+
+        return get_contest_ranking_list(self.request, self.object, elapsed=self.elapsed)
+
+    @cached_property
+    def elapsed(self):
+        return get_ranking_elapsed(self.request)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['has_rating'] = self.object.ratings.exists()
+        context['elapsed'] = self.elapsed
+        return context
+
+
+class ContestParticipationList(LoginRequiredMixin, ContestRankingBase):
+    tab = 'participation'
+
+    def get_title(self):
+        if self.profile == self.request.profile:
+            return _('Your participation in %s') % self.object.name
+        return _("%s's participation in %s") % (self.profile.username, self.object.name)
+
+    def get_ranking_list(self):
+        if not self.object.can_see_full_scoreboard(self.request.user) and self.profile != self.request.profile:
+            raise Http404()
+
+        queryset = self.object.users.filter(user=self.profile, virtual__gte=0).order_by('-virtual')
+        live_link = format_html('<a href="{2}#!{1}">{0}</a>', _('Live'), self.profile.username,
+                                reverse('contest_ranking', args=[self.object.key]))
+
+        return get_contest_ranking_list(
+            self.request, self.object, show_current_virtual=False,
+            ranking_list=partial(base_contest_ranking_list, queryset=queryset),
+            ranker=lambda users, key: ((user.participation.virtual or live_link, user) for user in users))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['has_rating'] = False
+        context['now'] = timezone.now()
+        context['rank_header'] = _('Participation')
+        return context
+
+    def get(self, request, *args, **kwargs):
+        if 'user' in kwargs:
+            self.profile = get_object_or_404(Profile, user__username=kwargs['user'])
+        else:
+            self.profile = self.request.profile
+        return super().get(request, *args, **kwargs)
+
+
+class ContestParticipationDisqualify(ContestMixin, SingleObjectMixin, View):
+    def get_object(self, queryset=None):
+        contest = super().get_object(queryset)
+        if not contest.is_editable_by(self.request.user):
+            raise Http404()
+        return contest
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+
+        try:
+            participation = self.object.users.get(pk=request.POST.get('participation'))
+        except ObjectDoesNotExist:
+            pass
+        else:
+            participation.set_disqualified(not participation.is_disqualified)
+        return HttpResponseRedirect(reverse('contest_ranking', args=(self.object.key,)))
+
+
+class ContestMossMixin(ContestMixin, PermissionRequiredMixin):
+    permission_required = 'judge.moss_contest'
+
+    def get_object(self, queryset=None):
+        contest = super().get_object(queryset)
+        if settings.MOSS_API_KEY is None or not contest.is_editable_by(self.request.user):
+            raise Http404()
+        return contest
+
+
+class ContestMossView(ContestMossMixin, TitleMixin, DetailView):
+    template_name = 'coursework/moss.html'
+
+    def get_title(self):
+        return _('%s MOSS Results') % self.object.name
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        problems = list(map(attrgetter('problem'), self.object.problem_manifest))
+        languages = list(map(itemgetter(0), ContestMoss.LANG_MAPPING))
+
+        results = ContestMoss.objects.filter(contest=self.object)
+        moss_results = defaultdict(list)
+        for result in results:
+            moss_results[result.problem].append(result)
+
+        for result_list in moss_results.values():
+            result_list.sort(key=lambda x: languages.index(x.language))
+
+        context['languages'] = languages
+        context['has_results'] = results.exists()
+        context['moss_results'] = [(problem, moss_results[problem]) for problem in problems]
+
+        return context
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        status = run_moss.delay(self.object.key)
+        return redirect_to_task_status(
+            status, message=_('Running MOSS for %s...') % (self.object.name,),
+            redirect=reverse('contest_moss', args=(self.object.key,)),
+        )
+
+
+class ContestMossDelete(ContestMossMixin, SingleObjectMixin, View):
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        ContestMoss.objects.filter(contest=self.object).delete()
+        return HttpResponseRedirect(reverse('contest_moss', args=(self.object.key,)))
+
+
+class ContestTagDetailAjax(DetailView):
+    model = ContestTag
+    slug_field = slug_url_kwarg = 'name'
+    context_object_name = 'tag'
+    template_name = 'coursework/tag-ajax.html'
+
+
+class ContestTagDetail(TitleMixin, ContestTagDetailAjax):
+    template_name = 'coursework/tag.html'
+
+    def get_title(self):
+        return _('Contest tag: %s') % self.object.name
+
+
+def _contest_data(contest, end_time=None):
+    return {
+        'key': contest.key,
+        'name': contest.name,
+        'url': contest.get_absolute_url(),
+        'start_time': contest.start_time.isoformat(),
+        'end_time': (end_time or contest.end_time).isoformat(),
+    }
+
+
+def coursework_dashboard(request):
+    """The running and upcoming homework, exercises and quizzes visible to the user, from one query."""
+    now = timezone.now()
+    dashboard = get_contest_dashboard(request.user, now=now)
+    return JsonResponse({
+        'now': now.isoformat(),
+        'kinds': {kind: {
+            'active': [_contest_data(participation.contest, participation.end_time)
+                       for participation in lists['active']],
+            'present': [_contest_data(contest) for contest in lists['present']],
+            'future': [_contest_data(contest) for contest in lists['future']],
+        } for kind, lists in dashboard.items()},
+    })